@@ -2,36 +2,110 @@
 
 __version__ = '0.1.41'
 __author__ = 'Vaclav_V'
-__all__ = ['PbSession', 'schemas']
+__all__ = [
+    'PbSession',
+    'RetryPolicy',
+    'RateLimiter',
+    'ReadCache',
+    'MemoryCache',
+    'DiskCache',
+    'NovaFilters',
+    'OrderFilters',
+    'PaymentFilters',
+    'ProductFilters',
+    'schemas',
+]
 
 
 import aiohttp
+import importlib
+import importlib.util
 import os
-from bs4 import BeautifulSoup
-
-from pb_admin.tags import Tags
-from pb_admin.categories import Categories
-from pb_admin.products import Products
-from pb_admin.tools import Tools
-from pb_admin.formats import Formats
-from pb_admin.subscriptions import Subscriptions
-from pb_admin.users import Users
-from pb_admin.orders import Orders
-from pb_admin.articles import Articles
-from pb_admin.creators import Creators
-from pb_admin.payments import Payments
-from pb_admin.fonts import Fonts
-from pb_admin.banners import Banners
-from pb_admin.user_groups import UserGroups
-from pb_admin.public_licences import PublicLicences
-from pb_admin import schemas
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from pb_admin._auth import extract_login_token
+from pb_admin._cache import DiskCache, MemoryCache, ReadCache
+from pb_admin._filters import NovaFilters, OrderFilters, PaymentFilters, ProductFilters
+from pb_admin._http import PbClient, PbResponse, RetryPolicy, RateLimiter
+
+if TYPE_CHECKING:
+    from pb_admin.tags import Tags
+    from pb_admin.categories import Categories
+    from pb_admin.products import Products
+    from pb_admin.tools import Tools
+    from pb_admin.formats import Formats
+    from pb_admin.subscriptions import Subscriptions
+    from pb_admin.users import Users
+    from pb_admin.orders import Orders
+    from pb_admin.articles import Articles
+    from pb_admin.creators import Creators
+    from pb_admin.payments import Payments
+    from pb_admin.fonts import Fonts
+    from pb_admin.banners import Banners
+    from pb_admin.user_groups import UserGroups
+    from pb_admin.public_licences import PublicLicences
+    from pb_admin import schemas
 
 SITE_URL = os.environ.get('SITE_URL', '')
 PB_LOGIN = os.environ.get('PB_LOGIN', '')
 PB_PASSWORD = os.environ.get('PB_PASSWORD', '')
+PB_COOKIE_JAR = os.environ.get('PB_COOKIE_JAR') or None
+
+# Resource attribute of PbSession -> (module, class), imported on first access
+_RESOURCES = {
+    'tags': ('pb_admin.tags', 'Tags'),
+    'categories': ('pb_admin.categories', 'Categories'),
+    'products': ('pb_admin.products', 'Products'),
+    'tools': ('pb_admin.tools', 'Tools'),
+    'formats': ('pb_admin.formats', 'Formats'),
+    'subscriptions': ('pb_admin.subscriptions', 'Subscriptions'),
+    'users': ('pb_admin.users', 'Users'),
+    'orders': ('pb_admin.orders', 'Orders'),
+    'articles': ('pb_admin.articles', 'Articles'),
+    'creators': ('pb_admin.creators', 'Creators'),
+    'payments': ('pb_admin.payments', 'Payments'),
+    'fonts': ('pb_admin.fonts', 'Fonts'),
+    'banners': ('pb_admin.banners', 'Banners'),
+    'user_groups': ('pb_admin.user_groups', 'UserGroups'),
+    'public_licences': ('pb_admin.public_licences', 'PublicLicences'),
+}
+
+
+# Resource class name -> module, e.g. `from pb_admin import Tags`
+_CLASSES = {class_name: module_name for module_name, class_name in _RESOURCES.values()}
+
+
+def __getattr__(name: str):
+    """Import resource classes and submodules on first access."""
+    if name in _CLASSES:
+        return getattr(importlib.import_module(_CLASSES[name]), name)
+    if not name.startswith('__') and importlib.util.find_spec(f'{__name__}.{name}'):
+        return importlib.import_module(f'{__name__}.{name}')
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *_CLASSES, *(m.rsplit('.', 1)[1] for m in _CLASSES.values())})
 
 
 class PbSession():
+    tags: 'Tags'
+    categories: 'Categories'
+    products: 'Products'
+    tools: 'Tools'
+    formats: 'Formats'
+    subscriptions: 'Subscriptions'
+    users: 'Users'
+    orders: 'Orders'
+    articles: 'Articles'
+    creators: 'Creators'
+    payments: 'Payments'
+    fonts: 'Fonts'
+    banners: 'Banners'
+    user_groups: 'UserGroups'
+    public_licences: 'PublicLicences'
+
     def __init__(
             self,
             site_url: str = SITE_URL,
@@ -39,42 +113,86 @@ class PbSession():
             password: str = PB_PASSWORD,
             basic_auth_login: str = None,
             basic_auth_password: str = None,
-            edit_mode: bool = False
+            edit_mode: bool = False,
+            retry_policy: RetryPolicy | None = None,
+            rate_limit: RateLimiter | None = None,
+            write_rate_limit: RateLimiter | None = None,
+            cookie_jar_path: str | None = PB_COOKIE_JAR,
+            json_loads: Callable[[str], Any] | None = None,
+            trusted_reads: bool = False,
+            cache: ReadCache | None = None,
     ) -> None:
         self.site_url = site_url
         self.login = login
         self.password = password
         self.basic_auth_login = basic_auth_login
         self.basic_auth_password = basic_auth_password
+        self.cookie_jar_path = cookie_jar_path
+        self.edit_mode = edit_mode
 
         self.session = aiohttp.ClientSession(
             auth=aiohttp.BasicAuth(
                 basic_auth_login,
                 basic_auth_password
             ) if basic_auth_login and basic_auth_password else None,
+            response_class=PbResponse,
         )
+        self.client = PbClient(
+            self.session,
+            retry_policy,
+            rate_limit,
+            write_rate_limit,
+            json_loads,
+            trusted_reads,
+            cache,
+        )
+        self.client.reauth = self._login
+
+    def __getattr__(self, name: str):
+        """Import and build resources on first access."""
+        if name not in _RESOURCES:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        module_name, class_name = _RESOURCES[name]
+        resource_cls = getattr(importlib.import_module(module_name), class_name)
+        resource = resource_cls(self.client, self.site_url, self.edit_mode)
+        setattr(self, name, resource)
+        return resource
 
-        self.tags = Tags(self.session, self.site_url, edit_mode)
-        self.categories = Categories(self.session, self.site_url, edit_mode)
-        self.products = Products(self.session, self.site_url, edit_mode)
-        self.tools = Tools(self.session, self.site_url, edit_mode)
-        self.formats = Formats(self.session, self.site_url, edit_mode)
-        self.subscriptions = Subscriptions(self.session, self.site_url, edit_mode)
-        self.users = Users(self.session, self.site_url, edit_mode)
-        self.orders = Orders(self.session, self.site_url, edit_mode)
-        self.articles = Articles(self.session, self.site_url, edit_mode)
-        self.creators = Creators(self.session, self.site_url, edit_mode)
-        self.payments = Payments(self.session, self.site_url, edit_mode)
-        self.fonts = Fonts(self.session, self.site_url, edit_mode)
-        self.banners = Banners(self.session, self.site_url, edit_mode)
-        self.user_groups = UserGroups(self.session, self.site_url, edit_mode)
-        self.public_licences = PublicLicences(self.session, self.site_url, edit_mode)
+    @property
+    def stats(self) -> dict[str, int]:
+        """Shared client counters: requests, retries, failures, throttled, reauths,
+        coalesced, skipped_writes.
+        """
+        return dict(self.client.stats)
 
     async def connect(self):
-        async with self.session.get(f'{self.site_url}/admin/login') as resp:
+        """Log in, reusing the persisted cookie jar when its session is still valid."""
+        is_restored = self._load_cookie_jar()
+        async with self.client.get(
+            f'{self.site_url}/admin/login',
+            allow_redirects=not is_restored,
+            auth_flow=True,
+        ) as resp:
+            if is_restored and self._is_authenticated_redirect(resp):
+                self._save_cookie_jar()
+                return
             resp.raise_for_status()
-            soup = BeautifulSoup(await resp.text(), 'html.parser')
-            token = soup.find('input', {'name': '_token'}).get('value')
+            login_page = await resp.text()
+        await self._login(login_page)
+
+    async def _login(self, login_page: str | None = None) -> None:
+        if login_page is None:
+            async with self.client.get(
+                f'{self.site_url}/admin/login',
+                allow_redirects=False,
+                auth_flow=True,
+            ) as resp:
+                if self._is_authenticated_redirect(resp):
+                    # Session is alive, the response only had to refresh XSRF-TOKEN
+                    return
+                resp.raise_for_status()
+                login_page = await resp.text()
+        token = extract_login_token(login_page)
 
         payload = {
             'email': self.login,
@@ -82,11 +200,46 @@ class PbSession():
             'remember': 'on',
             '_token': token
         }
-        async with self.session.post(f'{self.site_url}/admin/login', data=payload) as resp:
+        async with self.client.post(
+            f'{self.site_url}/admin/login',
+            data=payload,
+            auth_flow=True,
+        ) as resp:
             resp.raise_for_status()
+        self._save_cookie_jar()
 
     async def close(self):
-        await self.session.close()
+        self._save_cookie_jar()
+        await self.client.close()
+
+    def _load_cookie_jar(self) -> bool:
+        if not self.cookie_jar_path or not os.path.exists(self.cookie_jar_path):
+            return False
+        try:
+            self.session.cookie_jar.load(self.cookie_jar_path)
+        except Exception as e:
+            from loguru import logger
+            logger.warning(f'Cannot load cookie jar {self.cookie_jar_path}: {e}')
+            self.session.cookie_jar.clear()
+            return False
+        return True
+
+    def _save_cookie_jar(self) -> None:
+        if not self.cookie_jar_path or self.session.closed:
+            return
+        try:
+            self.session.cookie_jar.save(self.cookie_jar_path)
+        except OSError as e:
+            from loguru import logger
+            logger.warning(f'Cannot save cookie jar {self.cookie_jar_path}: {e}')
+
+    @staticmethod
+    def _is_authenticated_redirect(resp: aiohttp.ClientResponse) -> bool:
+        """Nova sends logged in users away from the login page."""
+        if resp.status not in (301, 302, 303, 307, 308):
+            return False
+        location = resp.headers.get('Location', '')
+        return bool(location) and not location.rstrip('/').endswith('/login')
 
     async def __aenter__(self) -> 'PbSession':
         await self.connect()
@@ -0,0 +1,50 @@
+import html
+import re
+
+_INPUT_TAG_RE = re.compile(r'<input\b[^>]*>', re.IGNORECASE)
+_META_TAG_RE = re.compile(r'<meta\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+
+
+def _get_attrs(tag: str) -> dict[str, str]:
+    return {
+        m.group(1).lower(): html.unescape(next(v for v in m.groups()[1:] if v is not None))
+        for m in _ATTR_RE.finditer(tag)
+    }
+
+
+def _scan_token(login_page: str) -> str | None:
+    for m in _INPUT_TAG_RE.finditer(login_page):
+        if '_token' not in m.group(0):
+            continue
+        attrs = _get_attrs(m.group(0))
+        if attrs.get('name') == '_token' and attrs.get('value'):
+            return attrs['value']
+    for m in _META_TAG_RE.finditer(login_page):
+        if 'csrf-token' not in m.group(0):
+            continue
+        attrs = _get_attrs(m.group(0))
+        if attrs.get('name') == 'csrf-token' and attrs.get('content'):
+            return attrs['content']
+    return None
+
+
+def extract_login_token(login_page: str) -> str:
+    """Get `_token` of the admin login form.
+
+    A targeted scan covers the known markup, BeautifulSoup is imported only
+    when the scan finds nothing.
+    """
+    token = _scan_token(login_page)
+    if token:
+        return token
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(login_page, 'html.parser')
+    field = soup.find('input', {'name': '_token'})
+    if field and field.get('value'):
+        return str(field.get('value'))
+    meta = soup.find('meta', {'name': 'csrf-token'})
+    if meta and meta.get('content'):
+        return str(meta.get('content'))
+    raise ValueError('Login token not found on the login page.')
@@ -0,0 +1,213 @@
+"""Read-through cache for slowly changing reference data.
+
+Values are stored pickled, so callers always get their own copy and can
+mutate returned models without touching the cache.
+"""
+import functools
+import inspect
+import pickle
+import sqlite3
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+# Seconds per cache namespace, usually the resource name
+DEFAULT_TTLS = {
+    'categories': 3600.0,
+    'formats': 3600.0,
+    'public_licences': 3600.0,
+    'creators': 600.0,
+    'fonts': 3600.0,
+    'tags': 600.0,
+    'tag_categories': 600.0,
+    'category_pages': 24 * 60 * 60.0,
+}
+
+
+class MemoryCache():
+    """In-process LRU backend bounded by entry count."""
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = OrderedDict()
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return value
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float) -> None:
+        self._entries[(namespace, key)] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace: str | None = None) -> None:
+        if namespace is None:
+            self._entries.clear()
+            return
+        for entry_key in [k for k in self._entries if k[0] == namespace]:
+            del self._entries[entry_key]
+
+
+class DiskCache():
+    """SQLite backend that survives restarts, LRU bounded by entry count."""
+    def __init__(self, path: str, maxsize: int = 10000) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        self.db = sqlite3.connect(path)
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                'namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, '
+                'expires_at REAL NOT NULL, used_at REAL NOT NULL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+            self.db.execute('CREATE INDEX IF NOT EXISTS cache_used_at ON cache (used_at)')
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        row = self.db.execute(
+            'SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?',
+            (namespace, key),
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        with self.db:
+            if row[1] <= now:
+                self.db.execute(
+                    'DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key)
+                )
+                return None
+            self.db.execute(
+                'UPDATE cache SET used_at = ? WHERE namespace = ? AND key = ?',
+                (now, namespace, key),
+            )
+        return row[0]
+
+    def set(self, namespace: str, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, used_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (namespace, key, value, now + ttl, now),
+            )
+            self.db.execute(
+                'DELETE FROM cache WHERE rowid IN ('
+                'SELECT rowid FROM cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                (self.maxsize,),
+            )
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self.db:
+            self.db.execute('DELETE FROM cache WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def clear(self, namespace: str | None = None) -> None:
+        with self.db:
+            if namespace is None:
+                self.db.execute('DELETE FROM cache')
+            else:
+                self.db.execute('DELETE FROM cache WHERE namespace = ?', (namespace,))
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class ReadCache():
+    """Per-namespace TTLs over a MemoryCache or DiskCache backend.
+
+    A TTL of 0 disables caching for that namespace.
+    """
+    def __init__(
+        self,
+        backend: MemoryCache | DiskCache | None = None,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = 300.0,
+    ) -> None:
+        self.backend = backend or MemoryCache()
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stats = Counter()
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: tuple,
+        load: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        ttl = self.ttls.get(namespace, self.default_ttl)
+        if ttl <= 0:
+            return await load()
+        raw = self.backend.get(namespace, repr(key))
+        if raw is not None:
+            self.stats['hits'] += 1
+            return pickle.loads(raw)
+        self.stats['misses'] += 1
+        value = await load()
+        self.backend.set(namespace, repr(key), pickle.dumps(value), ttl)
+        return value
+
+    def set(self, namespace: str, key: tuple, value: Any) -> None:
+        ttl = self.ttls.get(namespace, self.default_ttl)
+        if ttl > 0:
+            self.backend.set(namespace, repr(key), pickle.dumps(value), ttl)
+
+    def delete(self, namespace: str, key: tuple) -> None:
+        self.backend.delete(namespace, repr(key))
+
+    def clear(self, namespace: str | None = None) -> None:
+        self.backend.clear(namespace)
+
+
+def cache_key(method_name: str, *args) -> tuple:
+    """Key of a `cached` method call with all arguments given positionally."""
+    return (method_name, *args)
+
+
+def _get_call_key(signature: inspect.Signature, method, self, args, kwargs) -> tuple:
+    bound = signature.bind(self, *args, **kwargs)
+    bound.apply_defaults()
+    return cache_key(method.__name__, *list(bound.arguments.values())[1:])
+
+
+def cached(namespace: str):
+    """Serve a resource method through `session.cache` when the session has one."""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            cache = self.session.cache
+            if cache is None:
+                return await method(self, *args, **kwargs)
+            key = _get_call_key(signature, method, self, args, kwargs)
+            return await cache.get_or_load(
+                namespace, key, lambda: method(self, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
+
+
+def single_flight(namespace: str):
+    """Share one in-flight call of a resource read between identical concurrent calls."""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (namespace, *_get_call_key(signature, method, self, args, kwargs))
+            return await self.session.single_flight(
+                key, lambda: method(self, *args, **kwargs)
+            )
+        return wrapper
+    return decorator
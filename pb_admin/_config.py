@@ -1,5 +1,6 @@
 TAG_IMG_SIZE = (1920, 1080)
 
+# Fallback for categories the pages resource does not link
 CATEGORY_PAGE_MAP = {
     -1: 41, # All
     53: 16, # Actions
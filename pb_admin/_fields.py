@@ -0,0 +1,203 @@
+"""Declarative parsing of Nova `fields` arrays.
+
+A FieldMap is built once per resource at import time from
+attribute -> handler rules. Handlers write converted values into the row dict,
+cells without a rule keep their raw value under their attribute.
+"""
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from enum import Enum
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+
+from pb_admin import schemas
+from pb_admin._records import Record, record_type
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+# handler(cell, values, context), context lives for one response
+Handler = Callable[[dict, dict, dict], None]
+
+
+def value(target: str, convert: Callable[[Any], Any] | None = None) -> Handler:
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        values[target] = convert(cell['value']) if convert else cell['value']
+    return handler
+
+
+def belongs_to(target: str) -> Handler:
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        values[target] = cell['belongsToId']
+    return handler
+
+
+def morph_to(targets: dict[str, str]) -> Handler:
+    """Map morphTo id by related resource name, e.g. {'products': 'product_id'}."""
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        target = targets.get(cell.get('resourceName'))
+        if target:
+            values[target] = cell['morphToId']
+    return handler
+
+
+def enum_value(target: str, enum_cls: type[Enum]) -> Handler:
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        values[target] = enum_cls(cell['value'])
+    return handler
+
+
+def option_value(target: str, enum_cls: type[Enum] | None = None) -> Handler:
+    """Select field shows its label, resolve it through `options` once per response."""
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        labels = context.get(cell['attribute'])
+        if labels is None:
+            labels = {o['label']: o['value'] for o in cell['options']}
+            context[cell['attribute']] = labels
+        option = labels[cell['value']]
+        values[target] = enum_cls(option) if enum_cls else option
+    return handler
+
+
+def make_image(raw_img: dict, with_alt: bool = True) -> schemas.Image:
+    return schemas.Image(
+        ident=raw_img['id'],
+        mime_type=raw_img['mime_type'],
+        original_url=raw_img['original_url'],
+        file_name=raw_img['file_name'],
+        alt=raw_img['custom_properties'].get('alt')
+        if with_alt and raw_img.get('custom_properties') else None,
+    )
+
+
+def media(target: str, many: bool = False, with_alt: bool = True) -> Handler:
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        raw_imgs = cell['value'] or []
+        if many:
+            values[target] = [make_image(raw_img, with_alt) for raw_img in raw_imgs]
+        else:
+            values[target] = make_image(raw_imgs[0], with_alt) if raw_imgs else None
+    return handler
+
+
+def nested(field_map: 'FieldMap | None' = None) -> Handler:
+    """Flatten a panel-like cell with sub `fields` into the row."""
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        if field_map:
+            field_map.parse(cell.get('fields') or [], values, context)
+        else:
+            for sub_cell in cell.get('fields') or []:
+                values[sub_cell['attribute']] = sub_cell['value']
+    return handler
+
+
+def when_component(component: str, then: Handler, otherwise: Handler | None = None) -> Handler:
+    """Apply `then` only to cells rendered by `component`."""
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        if cell.get('component') == component:
+            then(cell, values, context)
+        elif otherwise:
+            otherwise(cell, values, context)
+    return handler
+
+
+def combine(*handlers: Handler) -> Handler:
+    def handler(cell: dict, values: dict, context: dict) -> None:
+        for sub_handler in handlers:
+            sub_handler(cell, values, context)
+    return handler
+
+
+def build(
+    model_cls: type[ModelT],
+    trusted: bool,
+    as_record: bool = False,
+    **values
+) -> ModelT | Record:
+    """Build model, skipping validation for trusted rows decoded from the admin.
+
+    With `as_record` a slotted record of the same fields is returned instead.
+    """
+    if as_record:
+        return record_type(model_cls)(**values)
+    if trusted:
+        return model_cls.model_construct(**values)
+    return model_cls(**values)
+
+
+def has_new_media(model: BaseModel) -> bool:
+    """Model carries images to upload, their ids are only known after a re-read."""
+    for name in type(model).model_fields:
+        field_value = getattr(model, name)
+        images = field_value if isinstance(field_value, list) else [field_value]
+        for image in images:
+            if isinstance(image, schemas.Image) and not image.ident:
+                return True
+    return False
+
+
+def merge_written(model: ModelT, raw_resp: dict | None) -> ModelT:
+    """Submitted model with id and timestamps from the Nova write response."""
+    raw_resp = raw_resp or {}
+    resource = raw_resp.get('resource') or {}
+    model_fields = type(model).model_fields
+    update = {}
+    ident = resource.get('id', raw_resp.get('id'))
+    if ident is not None and 'ident' in model_fields:
+        update['ident'] = ident
+    for attribute in ('created_at', 'updated_at'):
+        if attribute in model_fields and resource.get(attribute):
+            update[attribute] = datetime.fromisoformat(resource[attribute])
+    written = model.model_copy(update=update, deep=True)
+    if isinstance(written, schemas.TrackedModel):
+        written.mark_loaded()
+    return written
+
+
+def skip_unchanged(model: BaseModel, stats: Counter, label: str) -> bool:
+    """True when a loaded model has no changes and its update can be skipped.
+
+    The decision is kept on the model, see TrackedModel.is_update_skipped.
+    """
+    if not isinstance(model, schemas.TrackedModel):
+        return False
+    model._update_skipped = model.is_loaded and not model.is_dirty
+    if not model._update_skipped:
+        return False
+    stats['skipped_writes'] += 1
+    from loguru import logger
+    logger.info(f'{label} is unchanged, update skipped')
+    return True
+
+
+class FieldMap():
+    def __init__(self, rules: dict[str, Handler] | None = None) -> None:
+        self.rules = dict(rules or {})
+
+    def parse(
+        self,
+        cells: Iterable[dict],
+        values: dict | None = None,
+        context: dict | None = None,
+    ) -> dict:
+        """Parse one `fields` array into a dict of values.
+
+        Cells without attribute (panels, dependency containers) match the '' rule.
+        """
+        values = {} if values is None else values
+        context = {} if context is None else context
+        rules = self.rules
+        for cell in cells:
+            attribute = cell.get('attribute')
+            handler = rules.get(attribute or '')
+            if handler is None:
+                values[attribute] = cell.get('value')
+            else:
+                handler(cell, values, context)
+        return values
+
+    def parse_rows(self, rows: Iterable[dict]) -> list[dict[str, Any]]:
+        """Parse Nova index `resources` sharing one context, so option maps are built once."""
+        context = {}
+        return [self.parse(row['fields'], {}, context) for row in rows]
@@ -0,0 +1,129 @@
+"""Nova index filters, sent as base64 JSON in the `filters` query param.
+
+An empty filter list encodes to 'W10=', what the admin UI sends by default.
+Nova ignores filter classes a resource does not declare, so filters are
+resolved against `/nova-api/<resource>/filters` before they are sent.
+"""
+import base64
+import json
+import re
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from pb_admin._http import PbClient
+
+_NOT_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+async def get_available_filters(session: 'PbClient', index_url: str) -> list[dict]:
+    """Filters the index at `index_url` declares, fetched once per client."""
+    available = session.available_filters.get(index_url)
+    if available is None:
+        async with session.get(f'{index_url}/filters') as resp:
+            resp.raise_for_status()
+            available = await resp.json()
+        session.available_filters[index_url] = available
+    return available
+
+
+def _normalize(name: str) -> str:
+    """'PaymentStatus', 'payment_status' and 'Payment Status' name the same filter."""
+    return _NOT_ALNUM.sub('', str(name).rsplit('\\', 1)[-1].lower())
+
+
+class NovaFilters():
+    """Filters and ordering of one Nova index request, applied by the admin,
+    so only matching pages are transferred.
+
+    A filter is named by its Nova class, the class basename or its label in
+    any case, e.g. `PaymentFilters(payment_status='paid')`. Option filters
+    take an option value or label. Names and options are checked against the
+    filters the resource declares, unknown ones raise ValueError.
+    """
+    def __init__(
+        self,
+        order_by: str = '',
+        order_by_direction: str = 'desc',
+        **values: Any,
+    ) -> None:
+        self._filters: list[tuple[str, Any]] = []
+        self.order_by = order_by
+        self.order_by_direction = order_by_direction
+        for name, value in values.items():
+            self.where(name, value)
+
+    def where(self, name: str, value: Any) -> 'NovaFilters':
+        if isinstance(value, Enum):
+            value = value.value
+        self._filters.append((name, value))
+        return self
+
+    def order(self, order_by: str, direction: str = 'desc') -> 'NovaFilters':
+        self.order_by = order_by
+        self.order_by_direction = direction
+        return self
+
+    def resolve(self, available: list[dict]) -> list[dict[str, Any]]:
+        """`[{filter class: value}]` of the filters in `available`, as Nova lists them."""
+        resolved = []
+        for name, value in self._filters:
+            spec = self._find(name, available)
+            resolved.append({spec['class']: self._get_option_value(spec, value)})
+        return resolved
+
+    def encode(self, available: list[dict] | None = None) -> str:
+        if self._filters and available is None:
+            raise ValueError('Available filters of the resource are required to encode filters.')
+        return base64.b64encode(
+            json.dumps(self.resolve(available or []), separators=(',', ':')).encode()
+        ).decode()
+
+    def to_params(self, available: list[dict] | None = None) -> dict[str, str]:
+        params = {'filters': self.encode(available)}
+        if self.order_by:
+            params['orderBy'] = self.order_by
+            params['orderByDirection'] = self.order_by_direction
+        return params
+
+    async def get_params(self, session: 'PbClient', index_url: str) -> dict[str, str]:
+        """`to_params` resolved against the filters of the index at `index_url`."""
+        available = await get_available_filters(session, index_url) if self._filters else None
+        return self.to_params(available)
+
+    def _find(self, name: str, available: list[dict]) -> dict:
+        for spec in available:
+            if spec['class'] == name:
+                return spec
+        key = _normalize(name)
+        matches = [
+            spec for spec in available
+            if key in (_normalize(spec['class']), _normalize(spec.get('name', '')))
+        ]
+        if len(matches) != 1:
+            known = ', '.join(spec['class'] for spec in available) or 'none'
+            reason = 'Ambiguous' if matches else 'Unknown'
+            raise ValueError(
+                f'{reason} filter {name} of {type(self).__name__}, available: {known}.'
+            )
+        return matches[0]
+
+    @staticmethod
+    def _get_option_value(spec: dict, value: Any) -> Any:
+        options = spec.get('options')
+        if not options or isinstance(value, (dict, list, bool)):
+            return value
+        for option in options:
+            if str(option.get('value')) == str(value):
+                return option['value']
+        for option in options:
+            if option.get('label') == value:
+                return option['value']
+        labels = ', '.join(str(option.get('label')) for option in options)
+        raise ValueError(f'Unknown option {value} of filter {spec["class"]}, options: {labels}.')
+
+
+# Per-resource names for signatures, every index takes the same NovaFilters
+OrderFilters = NovaFilters
+PaymentFilters = NovaFilters
+ProductFilters = NovaFilters
@@ -0,0 +1,123 @@
+"""Typed column builders for DataFrame export of list endpoints.
+
+Requires pandas (and numpy with it), imported only when a frame is built.
+"""
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+INT = 'int'
+FLOAT = 'float'
+BOOL = 'bool'
+DATETIME = 'datetime'
+STR = 'str'
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_NUMPY_DTYPES = {
+    INT: np.int64,
+    FLOAT: np.float64,
+    BOOL: np.bool_,
+    DATETIME: np.int64,
+    STR: object,
+}
+
+
+class ColumnBuilder():
+    """Appends Nova pages into preallocated column arrays.
+
+    `columns` maps column name to a kind (INT, FLOAT, BOOL, DATETIME, STR) or
+    an Enum class, which becomes a categorical column.
+    """
+    def __init__(self, columns: dict[str, str | type[Enum]], capacity: int = 0) -> None:
+        self.columns = columns
+        self.size = 0
+        self._capacity = 0
+        self._data: dict[str, np.ndarray] = {}
+        self._mask: dict[str, np.ndarray] = {}
+        self.reserve(capacity)
+
+    def reserve(self, capacity: int) -> None:
+        """Grow all columns to hold at least `capacity` rows."""
+        if capacity <= self._capacity:
+            return
+        for name, kind in self.columns.items():
+            dtype = object if isinstance(kind, type) else _NUMPY_DTYPES[kind]
+            data = np.empty(capacity, dtype=dtype)
+            mask = np.zeros(capacity, dtype=np.bool_)
+            if self.size:
+                data[:self.size] = self._data[name][:self.size]
+                mask[:self.size] = self._mask[name][:self.size]
+            self._data[name] = data
+            self._mask[name] = mask
+        self._capacity = capacity
+
+    def append(self, rows: list[dict]) -> None:
+        if self.size + len(rows) > self._capacity:
+            self.reserve(max(self.size + len(rows), self._capacity * 2))
+        start = self.size
+        for name, kind in self.columns.items():
+            data = self._data[name]
+            mask = self._mask[name]
+            for i, row in enumerate(rows, start):
+                value = row.get(name)
+                if value is None:
+                    mask[i] = True
+                    if data.dtype != object:
+                        data[i] = 0
+                    else:
+                        data[i] = None
+                elif kind == DATETIME:
+                    data[i] = _to_ns(value)
+                elif isinstance(kind, type):
+                    data[i] = value.value if isinstance(value, Enum) else value
+                else:
+                    data[i] = value
+        self.size += len(rows)
+
+    def to_frame(self) -> pd.DataFrame:
+        series = {}
+        for name, kind in self.columns.items():
+            data = self._data[name][:self.size]
+            mask = self._mask[name][:self.size]
+            if isinstance(kind, type):
+                series[name] = pd.Categorical(data, categories=[e.value for e in kind])
+            elif kind == INT:
+                series[name] = pd.arrays.IntegerArray(data.copy(), mask.copy())
+            elif kind == FLOAT:
+                series[name] = pd.arrays.FloatingArray(data.copy(), mask.copy())
+            elif kind == BOOL:
+                series[name] = pd.arrays.BooleanArray(data.copy(), mask.copy())
+            elif kind == DATETIME:
+                values = data.copy().view('datetime64[ns]')
+                values[mask] = np.datetime64('NaT')
+                series[name] = pd.DatetimeIndex(values).tz_localize('UTC')
+            else:
+                series[name] = data.copy()
+        return pd.DataFrame(series)
+
+
+async def build_frame(
+    pages: AsyncIterator[tuple[list[dict], int | None]],
+    columns: dict[str, str | type[Enum]],
+    limit: int | None = None,
+) -> pd.DataFrame:
+    """DataFrame of (rows, total) index pages, columns are preallocated from the total."""
+    builder = ColumnBuilder(columns)
+    async for rows, total in pages:
+        if total:
+            builder.reserve(total if limit is None else min(total, limit))
+        builder.append(rows)
+    return builder.to_frame()
+
+
+def _to_ns(value: datetime | str) -> int:
+    """Nanoseconds since epoch, naive datetimes are taken as UTC."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1) * 1000
@@ -0,0 +1,383 @@
+import asyncio
+import copy
+import json
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import TYPE_CHECKING, Any
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qs, urlparse
+
+from aiohttp import ClientConnectionError, ClientResponse, ClientSession
+
+if TYPE_CHECKING:
+    from pb_admin._cache import ReadCache
+
+
+def get_default_json_loads() -> Callable[[str], Any]:
+    """orjson when it is installed, stdlib json otherwise."""
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+class PbResponse(ClientResponse):
+    """ClientResponse that decodes JSON with the client's backend by default."""
+    json_loads: Callable[[str], Any] = staticmethod(json.loads)
+
+    async def json(
+        self,
+        *,
+        encoding: str | None = None,
+        loads: Callable[[str], Any] | None = None,
+        content_type: str | None = 'application/json',
+    ) -> Any:
+        return await super().json(
+            encoding=encoding,
+            loads=loads or self.json_loads,
+            content_type=content_type,
+        )
+
+
+class RetryPolicy():
+    """Exponential backoff with full jitter for transient admin errors.
+
+    Only idempotent methods are retried unless `retry_writes` is set.
+    """
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        statuses: tuple[int, ...] = (429, 502, 503, 504),
+        methods: tuple[str, ...] = ('GET', 'HEAD', 'OPTIONS'),
+        retry_writes: bool = False,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.statuses = frozenset(statuses)
+        self.methods = frozenset(m.upper() for m in methods)
+        self.retry_writes = retry_writes
+
+    def is_retryable(self, method: str) -> bool:
+        return self.retry_writes or method.upper() in self.methods
+
+    def get_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """Seconds to wait before the next attempt, `Retry-After` wins if present."""
+        if retry_after:
+            delay = self._parse_retry_after(retry_after)
+            if delay is not None:
+                return delay
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(value: str) -> float | None:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (retry_at - datetime.now(tz=timezone.utc)).total_seconds())
+
+
+class RateLimiter():
+    """Token bucket of `rps` requests per second plus a cap on requests in flight.
+
+    A concurrency slot is held while a request waits for its response headers,
+    not while the caller reads the body, so nested requests cannot deadlock.
+    """
+    def __init__(
+        self,
+        rps: float | None = None,
+        max_concurrency: int | None = None,
+        burst: int | None = None,
+    ) -> None:
+        self.rps = rps
+        self.burst = burst or max(1, int(rps or 1))
+        self.max_concurrency = max_concurrency
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def wait_token(self) -> float:
+        """Take one token, return seconds spent waiting for it."""
+        if not self.rps:
+            return 0.0
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rps)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rps
+                waited += delay
+                await asyncio.sleep(delay)
+
+    async def acquire_slot(self) -> None:
+        if self._semaphore:
+            await self._semaphore.acquire()
+
+    def release_slot(self) -> None:
+        if self._semaphore:
+            self._semaphore.release()
+
+
+class _RequestContext():
+    """Same `async with` / `await` contract as aiohttp request context managers."""
+    def __init__(
+        self,
+        client: 'PbClient',
+        method: str,
+        url,
+        retry: bool | None,
+        auth_flow: bool,
+        kwargs: dict,
+    ) -> None:
+        self._client = client
+        self._method = method
+        self._url = url
+        self._retry = retry
+        self._auth_flow = auth_flow
+        self._kwargs = kwargs
+        self._resp = None
+
+    def __await__(self):
+        return self._send().__await__()
+
+    async def _send(self) -> ClientResponse:
+        return await self._client._request(
+            self._method, self._url, self._retry, self._auth_flow, **self._kwargs
+        )
+
+    async def __aenter__(self) -> ClientResponse:
+        self._resp = await self._send()
+        return self._resp
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        self._resp.release()
+
+
+class PbClient():
+    """Shared request path for all resources on top of one aiohttp session.
+
+    Writes use `write_limiter` when given, otherwise reads and writes share `limiter`.
+    When `reauth` is set, an expired admin session (401/419 or a bounce to the
+    login page) triggers one shared re-login and a replay of the request.
+    """
+    WRITE_METHODS = frozenset(('POST', 'PUT', 'PATCH', 'DELETE'))
+    EXPIRED_STATUSES = frozenset((401, 419))
+
+    def __init__(
+        self,
+        session: ClientSession,
+        retry_policy: RetryPolicy | None = None,
+        limiter: RateLimiter | None = None,
+        write_limiter: RateLimiter | None = None,
+        json_loads: Callable[[str], Any] | None = None,
+        trusted_reads: bool = False,
+        cache: 'ReadCache | None' = None,
+    ) -> None:
+        self.session = session
+        self.json_loads = json_loads or get_default_json_loads()
+        # List endpoints build models without validation, see _fields.build
+        self.trusted_reads = trusted_reads
+        # Read-through cache of reference data, see _cache.cached
+        self.cache = cache
+        # Index URL -> filters it declares, see _filters.get_available_filters
+        self.available_filters: dict[str, list[dict]] = {}
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.limiter = limiter
+        self.write_limiter = write_limiter
+        self.reauth: Callable[[], Awaitable[None]] | None = None
+        self.stats = Counter()
+        self._auth_lock = asyncio.Lock()
+        self._auth_generation = 0
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    @property
+    def cookie_jar(self):
+        return self.session.cookie_jar
+
+    def get(self, url, **kwargs) -> _RequestContext:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs) -> _RequestContext:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs) -> _RequestContext:
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs) -> _RequestContext:
+        return self.request('DELETE', url, **kwargs)
+
+    def request(
+        self,
+        method: str,
+        url,
+        retry: bool | None = None,
+        auth_flow: bool = False,
+        **kwargs
+    ) -> _RequestContext:
+        """Send request, `retry` overrides the policy decision for this call.
+
+        Requests of the login flow itself pass `auth_flow=True`: they never
+        trigger re-authentication and do not take a concurrency slot.
+        """
+        return _RequestContext(self, method.upper(), url, retry, auth_flow, kwargs)
+
+    def get_limiter(self, method: str) -> RateLimiter | None:
+        if self.write_limiter and method.upper() in self.WRITE_METHODS:
+            return self.write_limiter
+        return self.limiter
+
+    async def close(self) -> None:
+        await self.session.close()
+
+    async def single_flight(self, key: tuple, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `load` once for all concurrent callers with the same key.
+
+        Every caller, including the one that started the call, gets its own
+        deep copy of the result, so models stay private to each caller.
+        Cancelling one caller does not cancel the shared call.
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        task = asyncio.ensure_future(load())
+        self._inflight[key] = task
+
+        def forget(_) -> None:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        task.add_done_callback(forget)
+        return copy.deepcopy(await asyncio.shield(task))
+
+    async def iter_pages(self, url: str, params: dict) -> AsyncIterator[dict]:
+        """Yield raw Nova index pages, following `next_page_url`."""
+        params = dict(params)
+        while True:
+            async with self.get(url, params=params) as resp:
+                resp.raise_for_status()
+                raw_page = await resp.json()
+            yield raw_page
+            if not raw_page.get('next_page_url'):
+                return
+            params.update(parse_qs(urlparse(raw_page['next_page_url']).query))
+
+    async def _request(
+        self,
+        method: str,
+        url,
+        retry: bool | None,
+        auth_flow: bool,
+        **kwargs
+    ) -> ClientResponse:
+        policy = self.retry_policy
+        if retry is None:
+            retry = policy.is_retryable(method)
+        limiter = self.get_limiter(method)
+        can_reauth = self.reauth is not None and not auth_flow
+        attempt = 0
+        while True:
+            auth_generation = self._auth_generation
+            if limiter:
+                waited = await limiter.wait_token()
+                if waited:
+                    self.stats['throttled'] += 1
+            self.stats['requests'] += 1
+            try:
+                resp = await self._send(limiter if not auth_flow else None, method, url, kwargs)
+                if isinstance(resp, PbResponse):
+                    resp.json_loads = self.json_loads
+            except (ClientConnectionError, asyncio.TimeoutError) as e:
+                if not retry or attempt >= policy.max_retries:
+                    self.stats['failures'] += 1
+                    raise
+                delay = policy.get_delay(attempt)
+                reason = repr(e)
+            else:
+                if can_reauth and self._is_session_expired(resp):
+                    resp.release()
+                    await self._reauthenticate(auth_generation)
+                    self._refresh_xsrf_headers(kwargs)
+                    can_reauth = False
+                    continue
+                if resp.status not in policy.statuses:
+                    return resp
+                if not retry or attempt >= policy.max_retries:
+                    self.stats['failures'] += 1
+                    return resp
+                delay = policy.get_delay(attempt, resp.headers.get('Retry-After'))
+                reason = f'status {resp.status}'
+                resp.release()
+            attempt += 1
+            self.stats['retries'] += 1
+            from loguru import logger
+            logger.warning(f'{method} {url} failed with {reason}, retry {attempt} in {delay:.2f}s')
+            await asyncio.sleep(delay)
+
+    async def _send(
+        self,
+        limiter: RateLimiter | None,
+        method: str,
+        url,
+        kwargs: dict,
+    ) -> ClientResponse:
+        """One attempt, inside a concurrency slot of `limiter`."""
+        if limiter:
+            await limiter.acquire_slot()
+        try:
+            return await self.session.request(method, url, **kwargs)
+        finally:
+            if limiter:
+                limiter.release_slot()
+
+    async def _reauthenticate(self, auth_generation: int) -> None:
+        """Log in again unless another request already did since `auth_generation`."""
+        async with self._auth_lock:
+            if auth_generation != self._auth_generation:
+                return
+            from loguru import logger
+            logger.warning('Admin session expired, logging in again')
+            await self.reauth()
+            self._auth_generation += 1
+            self.stats['reauths'] += 1
+
+    def _refresh_xsrf_headers(self, kwargs: dict) -> None:
+        headers = kwargs.get('headers')
+        if not headers:
+            return
+        xsrf_token = None
+        for cookie in self.session.cookie_jar:
+            if cookie.key == 'XSRF-TOKEN':
+                xsrf_token = cookie.value
+        if xsrf_token is None:
+            return
+        for header in ('X-CSRF-TOKEN', 'X-XSRF-TOKEN'):
+            if header in headers:
+                headers[header] = xsrf_token
+
+    def _is_session_expired(self, resp: ClientResponse) -> bool:
+        if resp.status in self.EXPIRED_STATUSES:
+            return True
+        if resp.history and self._is_login_url(str(resp.url)):
+            return True
+        if resp.status in (301, 302, 303) and self._is_login_url(resp.headers.get('Location', '')):
+            return True
+        return False
+
+    @staticmethod
+    def _is_login_url(url: str) -> bool:
+        return url.split('?')[0].rstrip('/').endswith('/login')
@@ -1,4 +1,3 @@
-from PIL import Image
 from aiohttp import ClientSession
 import uuid
 import io
@@ -13,6 +12,8 @@ async def prepare_image(
     session: ClientSession = None
 ) -> schemas.Image:
     """Prepare image for upload to Pixelbuddha."""
+    from PIL import Image
+
     if not image.original_url and not image.data:
         raise ValueError('Either original_url or data must be provided.')
     elif image.original_url and not image.data:
@@ -0,0 +1,36 @@
+"""Incremental reads of append-only list endpoints (orders, payments)."""
+from collections.abc import AsyncIterator, Callable
+from typing import TypeVar
+
+from pb_admin import schemas
+
+ModelT = TypeVar('ModelT')
+
+# Yields (rows, total) index pages sorted descending by the given column
+PageIterator = Callable[[str], AsyncIterator[tuple[list[dict], int | None]]]
+
+
+async def get_since(
+    iter_pages: PageIterator,
+    build: Callable[[dict], ModelT],
+    watermark: schemas.Watermark,
+) -> tuple[list[ModelT], schemas.Watermark]:
+    """Rows newer than `watermark`, newest first, and the new watermark.
+
+    Pages are requested in descending order of the watermark key, the id
+    when the watermark has one, and paging stops at the first already synced
+    row, so a regular sync costs one or two pages. Rows sharing the last
+    created_at of a created_at-only watermark are skipped by id.
+    """
+    new_watermark = watermark.model_copy(deep=True)
+    items = []
+    by_created_at = watermark.last_id is None and watermark.last_created_at is not None
+    async for rows, _ in iter_pages('created_at' if by_created_at else 'id'):
+        for row in rows:
+            if watermark.is_reached(row['ident'], row['created_at']):
+                return items, new_watermark
+            if watermark.is_synced(row['ident'], row['created_at']):
+                continue
+            items.append(build(row))
+            new_watermark.advance(row['ident'], row['created_at'])
+    return items, new_watermark
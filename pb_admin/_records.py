@@ -0,0 +1,51 @@
+"""Compact `__slots__` records mirroring schema models for bulk list results."""
+from functools import cache
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class Record():
+    __slots__ = ()
+    _fields: tuple[str, ...] = ()
+    _defaults: dict[str, Any] = {}
+    _model: type[BaseModel] = BaseModel
+
+    def __init__(self, **values) -> None:
+        for name in self._fields:
+            setattr(self, name, values.get(name, self._defaults.get(name)))
+
+    def as_dict(self) -> dict[str, Any]:
+        return {name: getattr(self, name) for name in self._fields}
+
+    def to_model(self, trusted: bool = False) -> BaseModel:
+        """Full schema model, validated unless `trusted`."""
+        if trusted:
+            return self._model.model_construct(**self.as_dict())
+        return self._model(**self.as_dict())
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{name}={getattr(self, name)!r}' for name in self._fields)
+        return f'{type(self).__name__}({values})'
+
+
+@cache
+def record_type(model_cls: type[BaseModel]) -> type[Record]:
+    """Slotted record class with the same field names as `model_cls`."""
+    field_names = tuple(model_cls.model_fields)
+    defaults = {
+        name: field.default
+        for name, field in model_cls.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+    return type(f'{model_cls.__name__}Record', (Record,), {
+        '__slots__': field_names,
+        '_fields': field_names,
+        '_defaults': defaults,
+        '_model': model_cls,
+    })
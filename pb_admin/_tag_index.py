@@ -0,0 +1,64 @@
+"""In-memory tag lookup by normalized name for dedup checks before create."""
+import difflib
+import re
+import unicodedata
+
+from pb_admin import schemas
+
+_SEPARATORS = re.compile(r'[\s_\-]+')
+
+
+def normalize_tag_name(name: str | None) -> str:
+    """Key of a tag name, equal for names that differ only in case, unicode
+    form or separators: 'Hand-Drawn' == 'hand drawn'.
+    """
+    if not name:
+        return ''
+    name = unicodedata.normalize('NFKC', name).casefold()
+    return _SEPARATORS.sub(' ', name).strip()
+
+
+class TagIndex():
+    def __init__(self, tags: list[schemas.Tag] | None = None) -> None:
+        self._by_ident: dict[int, schemas.Tag] = {}
+        self._by_name: dict[str, list[schemas.Tag]] = {}
+        for tag in tags or []:
+            self.add(tag)
+
+    def __len__(self) -> int:
+        return len(self._by_ident)
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_tag_name(name) in self._by_name
+
+    def get(self, name: str) -> schemas.Tag | None:
+        tags = self._by_name.get(normalize_tag_name(name))
+        return tags[0] if tags else None
+
+    def get_all(self, name: str) -> list[schemas.Tag]:
+        return list(self._by_name.get(normalize_tag_name(name), []))
+
+    def find(self, name: str, limit: int = 5, cutoff: float = 0.8) -> list[schemas.Tag]:
+        """Tags with names similar to `name`, best match first."""
+        matches = difflib.get_close_matches(
+            normalize_tag_name(name), self._by_name, n=limit, cutoff=cutoff
+        )
+        return [tag for match in matches for tag in self._by_name[match]][:limit]
+
+    def add(self, tag: schemas.Tag) -> None:
+        """Add tag or replace the indexed tag with the same id."""
+        if tag.ident is not None:
+            self.remove(tag.ident)
+            self._by_ident[tag.ident] = tag
+        self._by_name.setdefault(normalize_tag_name(tag.name), []).append(tag)
+
+    def remove(self, tag_ident: int) -> None:
+        tag = self._by_ident.pop(tag_ident, None)
+        if tag is None:
+            return
+        key = normalize_tag_name(tag.name)
+        tags = [t for t in self._by_name.get(key, []) if t.ident != tag_ident]
+        if tags:
+            self._by_name[key] = tags
+        else:
+            self._by_name.pop(key, None)
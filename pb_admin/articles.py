@@ -1,4 +1,5 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
+from pb_admin._fields import has_new_media, merge_written
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas, _image_tools as image_tools, _config as config
 from loguru import logger
@@ -9,7 +10,7 @@ from datetime import datetime
 
 
 class Articles():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
@@ -134,7 +135,17 @@ class Articles():
             content=[self.get_article_block(block) for block in values['content']] if values.get('content') else [],
         )
 
-    async def update(self, article: schemas.Article, is_lite: bool = True) -> schemas.Article:
+    async def update(
+        self,
+        article: schemas.Article,
+        is_lite: bool = True,
+        refetch: bool = False,
+    ) -> schemas.Article:
+        """Update article.
+
+        Returns the submitted article with id and timestamps of the response,
+        re-read from the admin with `refetch` or when new images were uploaded.
+        """
         if not self.edit_mode:
             raise ValueError('Edit mode is required')
         if not article.ident:
@@ -188,9 +199,12 @@ class Articles():
             allow_redirects=False,
         ) as resp:
             resp.raise_for_status()
-        if is_lite:
-            return
-        return await self.get(article.ident)
+            if is_lite:
+                return
+            raw_article = await resp.json()
+        if refetch or has_new_media(article):
+            return await self.get(article.ident)
+        return merge_written(article, raw_article)
 
     @staticmethod
     def get_article_block(
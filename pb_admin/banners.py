@@ -1,13 +1,32 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
+from pb_admin._fields import has_new_media, merge_written, skip_unchanged
 from urllib.parse import urlparse, parse_qs
-from pb_admin import schemas
+from pb_admin import schemas, _fields
 import uuid
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 from datetime import datetime
 
 
+DEPENDENCY_FIELDS = _fields.FieldMap({
+    'link': _fields.value('link'),
+    'link_blank': _fields.value('link_blank'),
+    'options->height': _fields.value('height', lambda v: int(v) if v else None),
+    'options->color': _fields.value('color', lambda v: v or None),
+})
+
+BANNER_FIELDS = _fields.FieldMap({
+    # Top banner options live in an unnamed dependency container
+    '': _fields.when_component(
+        'nova-dependency-container',
+        _fields.nested(DEPENDENCY_FIELDS),
+    ),
+    'banner_images': _fields.media('images', many=True, with_alt=False),
+    'banner_images_retina': _fields.media('images_retina', many=True, with_alt=False),
+})
+
+
 class Banners():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
@@ -67,58 +86,43 @@ class Banners():
         async with self.session.get(f'{self.site_url}/nova-api/banners/{banner_id}') as resp:
             resp.raise_for_status()
             raw_banner = await resp.json()
-            values = {}
-            for cell in raw_banner['resource']['fields']:
-                if not cell['attribute'] and cell.get('component') == 'nova-dependency-container' and cell.get('fields'):
-                    for subcell in cell['fields']:
-                        if subcell['attribute'] == 'link':
-                            values['link'] = subcell['value']
-                        elif subcell['attribute'] == 'link_blank':
-                            values['link_blank'] = subcell['value']
-                        elif subcell['attribute'] == 'options->height':
-                            values['height'] = int(subcell['value']) if subcell['value'] else None
-                        elif subcell['attribute'] == 'options->color':
-                            values['color'] = subcell['value'] if subcell['value'] else None
-                else:
-                    values[cell['attribute']] = cell['value']
-            images = []
-            images_retina = []
-            for cell in values['banner_images']:
-                images.append(schemas.Image(
-                    ident=cell['id'],
-                    file_name=cell['file_name'],
-                    mime_type=cell['mime_type'],
-                    original_url=cell['original_url'],
-                ))
-            for cell in values['banner_images_retina']:
-                images_retina.append(schemas.Image(
-                    ident=cell['id'],
-                    file_name=cell['file_name'],
-                    mime_type=cell['mime_type'],
-                    original_url=cell['original_url'],
-                ))
-
+            values = BANNER_FIELDS.parse(raw_banner['resource']['fields'])
 
         banner = schemas.Banner(
             ident=values.get('id'),
             banner_type=values.get('type'),
             is_active=values.get('is_enabled'),
             weight=values.get('order_index'),
-            images=images,
-            images_retina=images_retina,
+            images=values.get('images', []),
+            images_retina=values.get('images_retina', []),
             link=values.get('link'),
             open_in_new_tab=values.get('link_blank', False),
             color=values.get('color'),
             height=values.get('height'),
             assigned_group_ids=await self._get_groups(values.get('id')),
         )
-        return banner
+        return banner.mark_loaded()
+
+    async def update(
+        self,
+        banner: schemas.Banner,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.Banner | None:
+        """Update banner.
 
-    async def update(self, banner: schemas.Banner, is_lite: bool = False) -> schemas.Banner | None:
+        Returns the submitted banner with id of the response, re-read from
+        the admin with `refetch` or when new images were uploaded.
+
+        A loaded model without changes is returned without a request and
+        reports it in `is_update_skipped`.
+        """
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
         if not banner.ident:
             raise Exception('Banner id is required.')
+        if skip_unchanged(banner, self.session.stats, f'Banner {banner.ident}'):
+            return None if is_lite else banner
         boundary = str(uuid.uuid4())
         images = []
         images_retina = []
@@ -181,6 +185,7 @@ class Banners():
             params=params
         ) as resp:
             resp.raise_for_status()
+            raw_banner = await resp.json()
 
         banner_group_ids = await self._get_groups(banner.ident)
         group_ids_for_add = list(set(banner.assigned_group_ids) - set(banner_group_ids))
@@ -189,9 +194,19 @@ class Banners():
             await self._add_to_group(banner.ident, group_id)
         for group_id in group_ids_for_remove:
             await self._remove_from_group(banner.ident, group_id)
-        return None if is_lite else await self.get(banner.ident)
+        if is_lite:
+            return None
+        if refetch or has_new_media(banner):
+            return await self.get(banner.ident)
+        return merge_written(banner, raw_banner)
     
-    async def create(self, banner: schemas.Banner, is_lite: bool = False) -> schemas.Banner | None:
+    async def create(
+        self,
+        banner: schemas.Banner,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.Banner | None:
+        """Create banner, `refetch` as in `update`."""
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
         boundary = str(uuid.uuid4())
@@ -254,7 +269,11 @@ class Banners():
 
         for group_id in banner.assigned_group_ids:
             await self._add_to_group(banner_id, group_id)
-        return None if is_lite else await self.get(banner_id)
+        if is_lite:
+            return None
+        if refetch or has_new_media(banner):
+            return await self.get(banner_id)
+        return merge_written(banner, raw_banner)
 
     async def _get_groups(self, banner_id: int) -> list[int]:
         params = {
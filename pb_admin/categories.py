@@ -1,14 +1,17 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from pb_admin import schemas
+from pb_admin._cache import cached, single_flight
 from urllib.parse import urlparse, parse_qs
 
 
 class Categories():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
+    @single_flight('categories')
+    @cached('categories')
     async def get_list(self, search: str = '', is_lite: bool = True) -> list[schemas.Category]:
         """Get list of all categories in short version id, title, is_display, headline, weight, is_shown_in_filter."""
         categories = []
@@ -1,17 +1,20 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas
+from pb_admin._cache import cached
+from pb_admin._fields import skip_unchanged
 import uuid
 from requests_toolbelt import MultipartEncoder
 from datetime import datetime
 
 
 class Creators():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
+    @cached('creators')
     async def get_list(self, search: str = '', limit: int | None = None) -> list[schemas.CreatorLite]:
         creators = []
         is_next_page = True
@@ -56,7 +59,7 @@ class Creators():
                     file_name=values['avatar'][0]['file_name'],
                 ) if values.get('avatar') else None,
             )
-        return creator
+        return creator.mark_loaded()
 
     async def create(self, creator: schemas.Creator) -> schemas.Creator:
         if not self.edit_mode:
@@ -91,11 +94,20 @@ class Creators():
         ) as resp:
             resp.raise_for_status()
             raw_creator = await resp.json()
+        if self.session.cache:
+            self.session.cache.clear('creators')
         return await self.get(raw_creator['resource']['id'])
 
     async def update(self, creator: schemas.Creator) -> schemas.Creator:
+        """Update creator.
+
+        A loaded creator without changes is returned without a request and
+        reports it in `is_update_skipped`.
+        """
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
+        if skip_unchanged(creator, self.session.stats, f'Creator {creator.ident}'):
+            return creator
         boundary = str(uuid.uuid4())
         headers = {
             'Content-Type': f'multipart/form-data; boundary={boundary}',
@@ -127,4 +139,6 @@ class Creators():
         ) as resp:
             resp.raise_for_status()
             raw_creator = await resp.json()
+        if self.session.cache:
+            self.session.cache.clear('creators')
         return await self.get(raw_creator['resource']['id'])
\ No newline at end of file
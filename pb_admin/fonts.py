@@ -1,16 +1,18 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas
+from pb_admin._cache import cached
 import uuid
 from requests_toolbelt.multipart.encoder import MultipartEncoder
 
 
 class Fonts():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
+    @cached('fonts')
     async def get(self, ident: int) -> schemas.Font:
         params = {
             'editing': 'true',
@@ -69,6 +71,6 @@ class Fonts():
             if is_lite:
                 return
             raw_data = await resp.json()
-            new_font = await self.get(raw_data['id'])
-            return new_font
+        new_font = await self.get(raw_data['id'])
+        return new_font
         
\ No newline at end of file
@@ -1,14 +1,16 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas
+from pb_admin._cache import cached
 
 
 class Formats():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
+    @cached('formats')
     async def get_list(self, search: str = '') -> list[schemas.Format]:
         tags = []
         is_next_page = True
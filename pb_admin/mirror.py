@@ -0,0 +1,276 @@
+"""Local SQLite copy of the admin catalog for offline lookups and joins.
+
+Every resource table has the scalar fields of its schema as columns
+(`*_id` columns are indexed) plus `data` with the full model as JSON.
+"""
+import sqlite3
+import types
+import typing
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from enum import Enum
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from pb_admin import schemas
+
+if TYPE_CHECKING:
+    from pb_admin import PbSession
+
+# Resource attribute of PbSession -> schema of the mirrored list rows
+TABLES = {
+    'products': schemas.NewProductLite,
+    'tags': schemas.Tag,
+    'categories': schemas.Category,
+    'creators': schemas.CreatorLite,
+    'orders': schemas.Order,
+    'payments': schemas.Payment,
+    'users': schemas.PbUser,
+    'user_groups': schemas.UserGroupLight,
+}
+# Append-only resources, refreshed since the stored watermark
+INCREMENTAL = ('orders', 'payments')
+
+_SQL_TYPES = {
+    bool: 'INTEGER',
+    int: 'INTEGER',
+    float: 'REAL',
+    str: 'TEXT',
+    datetime: 'TEXT',
+}
+
+
+def _get_sql_type(annotation) -> str | None:
+    """SQLite type of a scalar field, None for lists and nested models."""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None
+        annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return 'INTEGER' if issubclass(annotation, int) else 'TEXT'
+    return _SQL_TYPES.get(annotation)
+
+
+def _get_columns(model_cls: type[BaseModel]) -> dict[str, str]:
+    columns = {}
+    for name, field in model_cls.model_fields.items():
+        sql_type = _get_sql_type(field.annotation)
+        if sql_type:
+            columns[name] = sql_type
+    return columns
+
+
+def _to_sql(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Mirror():
+    """SQLite mirror of products, tags, categories, creators, orders, payments,
+    users and user group membership.
+
+    `refresh` needs a connected PbSession, all lookups work offline.
+    """
+    def __init__(self, db_path: str, pb: 'PbSession | None' = None) -> None:
+        self.db_path = db_path
+        self.pb = pb
+        self.db = sqlite3.connect(db_path)
+        self.db.row_factory = sqlite3.Row
+        self._columns = {name: _get_columns(model_cls) for name, model_cls in TABLES.items()}
+        self._create_schema()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> 'Mirror':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    async def refresh(
+        self,
+        resources: Iterable[str] | None = None,
+        full: bool = False,
+    ) -> dict[str, int]:
+        """Pull resources from the admin, return number of rows written per resource.
+
+        Orders and payments only fetch rows newer than the last refresh,
+        `full` reloads them too, e.g. to pick up changed payment statuses.
+        """
+        if self.pb is None:
+            raise ValueError('Mirror is offline, pass a PbSession to refresh.')
+        resources = list(resources or TABLES)
+        for name in resources:
+            if name not in TABLES:
+                raise ValueError(f'Unknown mirror resource {name}.')
+        written = {}
+        for name in resources:
+            if name in INCREMENTAL and not full:
+                written[name] = await self._refresh_since(name)
+            elif name == 'user_groups':
+                written[name] = await self._refresh_user_groups()
+            else:
+                items = await getattr(self.pb, name).get_list()
+                with self.db:
+                    self.db.execute(f'DELETE FROM {name}')
+                    self._insert(name, items)
+                    if name in INCREMENTAL:
+                        watermark = schemas.Watermark()
+                        for item in items:
+                            watermark.advance(item.ident, item.created_at)
+                        self._save_state(name, watermark)
+                    else:
+                        self._save_state(name)
+                written[name] = len(items)
+        return written
+
+    def get(self, resource: str, ident: int) -> BaseModel | None:
+        row = self.db.execute(
+            f'SELECT data FROM {self._get_table(resource)} WHERE ident = ?', (ident,)
+        ).fetchone()
+        return TABLES[resource].model_validate_json(row['data']) if row else None
+
+    def get_list(self, resource: str, where: str = '', params: Iterable = ()) -> list[BaseModel]:
+        """Models of a resource, `where` is an SQL condition over its columns."""
+        sql = f'SELECT data FROM {self._get_table(resource)}'
+        if where:
+            sql += f' WHERE {where}'
+        model_cls = TABLES[resource]
+        return [
+            model_cls.model_validate_json(row['data'])
+            for row in self.db.execute(sql + ' ORDER BY ident', tuple(params))
+        ]
+
+    def query(self, sql: str, params: Iterable = ()) -> list[sqlite3.Row]:
+        """Run raw SQL, e.g. joins between mirrored tables."""
+        return self.db.execute(sql, tuple(params)).fetchall()
+
+    def get_user_ids(self, user_group_ident: int) -> list[int]:
+        return [
+            row['user_id'] for row in self.db.execute(
+                'SELECT user_id FROM user_group_users WHERE user_group_id = ? ORDER BY user_id',
+                (user_group_ident,),
+            )
+        ]
+
+    def get_user_group_ids(self, user_ident: int) -> list[int]:
+        return [
+            row['user_group_id'] for row in self.db.execute(
+                'SELECT user_group_id FROM user_group_users WHERE user_id = ? '
+                'ORDER BY user_group_id',
+                (user_ident,),
+            )
+        ]
+
+    def get_watermark(self, resource: str) -> schemas.Watermark:
+        row = self.db.execute(
+            'SELECT last_id, last_created_at FROM sync_state WHERE resource = ?', (resource,)
+        ).fetchone()
+        if not row:
+            return schemas.Watermark()
+        return schemas.Watermark(
+            last_id=row['last_id'],
+            last_created_at=row['last_created_at'],
+        )
+
+    def get_refreshed_at(self, resource: str) -> datetime | None:
+        row = self.db.execute(
+            'SELECT refreshed_at FROM sync_state WHERE resource = ?', (resource,)
+        ).fetchone()
+        return datetime.fromisoformat(row['refreshed_at']) if row else None
+
+    async def _refresh_since(self, name: str) -> int:
+        items, watermark = await getattr(self.pb, name).get_since(
+            watermark=self.get_watermark(name),
+        )
+        with self.db:
+            self._insert(name, items)
+            self._save_state(name, watermark)
+        return len(items)
+
+    async def _refresh_user_groups(self) -> int:
+        user_groups = await self.pb.user_groups.get_list()
+        memberships = []
+        for user_group in user_groups:
+            user_group = await self.pb.user_groups.get_users(user_group)
+            memberships.extend((user_group.ident, user_id) for user_id in user_group.user_ids)
+        with self.db:
+            self.db.execute('DELETE FROM user_groups')
+            self.db.execute('DELETE FROM user_group_users')
+            self._insert('user_groups', user_groups)
+            self.db.executemany(
+                'INSERT OR IGNORE INTO user_group_users (user_group_id, user_id) VALUES (?, ?)',
+                memberships,
+            )
+            self._save_state('user_groups')
+        return len(user_groups)
+
+    def _insert(self, name: str, items: list[BaseModel]) -> None:
+        columns = list(self._columns[name])
+        placeholders = ', '.join('?' * (len(columns) + 1))
+        self.db.executemany(
+            f'INSERT OR REPLACE INTO {name} ({", ".join(columns)}, data) VALUES ({placeholders})',
+            [
+                [_to_sql(getattr(item, column, None)) for column in columns]
+                + [item.model_dump_json()]
+                for item in items
+            ],
+        )
+
+    def _save_state(self, name: str, watermark: schemas.Watermark | None = None) -> None:
+        watermark = watermark or schemas.Watermark()
+        self.db.execute(
+            'INSERT OR REPLACE INTO sync_state '
+            '(resource, last_id, last_created_at, refreshed_at) VALUES (?, ?, ?, ?)',
+            (
+                name,
+                watermark.last_id,
+                _to_sql(watermark.last_created_at),
+                datetime.now(tz=timezone.utc).isoformat(),
+            ),
+        )
+
+    def _get_table(self, resource: str) -> str:
+        if resource not in TABLES:
+            raise ValueError(f'Unknown mirror resource {resource}.')
+        return resource
+
+    def _create_schema(self) -> None:
+        with self.db:
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS sync_state ('
+                'resource TEXT PRIMARY KEY, last_id INTEGER, '
+                'last_created_at TEXT, refreshed_at TEXT)'
+            )
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS user_group_users ('
+                'user_group_id INTEGER NOT NULL, user_id INTEGER NOT NULL, '
+                'PRIMARY KEY (user_group_id, user_id))'
+            )
+            self.db.execute(
+                'CREATE INDEX IF NOT EXISTS user_group_users_user_id '
+                'ON user_group_users (user_id)'
+            )
+            for name, columns in self._columns.items():
+                existing = [row['name'] for row in self.db.execute(f'PRAGMA table_info({name})')]
+                if existing and existing != [*columns, 'data']:
+                    # Schema changed since the mirror was written, rebuild the table
+                    self.db.execute(f'DROP TABLE {name}')
+                    self.db.execute('DELETE FROM sync_state WHERE resource = ?', (name,))
+                column_defs = ', '.join(
+                    f'{column} {sql_type} PRIMARY KEY' if column == 'ident'
+                    else f'{column} {sql_type}'
+                    for column, sql_type in columns.items()
+                )
+                self.db.execute(f'CREATE TABLE IF NOT EXISTS {name} ({column_defs}, data TEXT)')
+                for column in columns:
+                    if column.endswith('_id'):
+                        self.db.execute(
+                            f'CREATE INDEX IF NOT EXISTS {name}_{column} ON {name} ({column})'
+                        )
@@ -1,64 +1,147 @@
-from aiohttp import ClientSession
-from urllib.parse import urlparse, parse_qs
-from pb_admin import schemas
+from pb_admin._http import PbClient
+from pb_admin._fields import merge_written
+from pb_admin._filters import OrderFilters
+from collections.abc import AsyncIterator
+from pb_admin import schemas, _fields, _paging, _records as records
 from datetime import datetime, timezone
 import uuid
 from requests_toolbelt import MultipartEncoder
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas
+
+
+LIST_FIELDS = _fields.FieldMap({
+    'count': _fields.value('count', int),
+    'price': _fields.value('price', float),
+    'discounted_price': _fields.value('discounted_price', float),
+    'user': _fields.belongs_to('user_id'),
+    'Orderable': _fields.morph_to({
+        'products': 'product_id',
+        'subscriptions': 'user_subscription_id',
+    }),
+})
+
+ORDER_FIELDS = _fields.FieldMap({
+    **LIST_FIELDS.rules,
+    'coupon': _fields.combine(_fields.value('coupon'), _fields.belongs_to('coupon_id')),
+})
+
+# Column kinds of _frames.ColumnBuilder
+FRAME_COLUMNS = {
+    'ident': 'int',
+    'is_payed': 'bool',
+    'count': 'int',
+    'price': 'float',
+    'discounted_price': 'float',
+    'user_id': 'int',
+    'created_at': 'datetime',
+    'product_id': 'int',
+    'user_subscription_id': 'int',
+    'coupon': 'str',
+    'is_extended_license': 'bool',
+}
+
+
+def _get_list_order_fields(values: dict) -> dict:
+    return {
+        'ident': values.get('id'),
+        'is_payed': True if values.get('payed') == 'Payed' else False,
+        'count': values.get('count'),
+        'price': values.get('price'),
+        'discounted_price': values.get('discounted_price'),
+        'user_id': values.get('user_id'),
+        'created_at': (
+            datetime.fromisoformat(values.get('created_at')) if values.get('created_at') else None
+        ),
+        'product_id': values.get('product_id'),
+        'user_subscription_id': values.get('user_subscription_id'),
+        'coupon': values.get('coupon'),
+        'is_extended_license': False if values.get('extended') == 'Standard' else True,
+    }
 
 
 class Orders():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
-    async def get_list(self, search: str | None = None, limit: int | None = None) -> list[schemas.Order]:
+    async def get_list(
+        self,
+        search: str | None = None,
+        limit: int | None = None,
+        as_records: bool = False,
+        filters: OrderFilters | None = None,
+    ) -> list[schemas.Order] | list[records.Record]:
+        """`as_records` returns compact slotted records, see `Record.to_model`."""
         orders = []
-        is_next_page = True
+        async for rows, _ in self._iter_list_pages(search, limit, filters=filters):
+            for row in rows:
+                orders.append(
+                    _fields.build(schemas.Order, self.session.trusted_reads, as_records, **row)
+                )
+        return orders
+
+    async def to_frame(
+        self,
+        search: str | None = None,
+        limit: int | None = None,
+        filters: OrderFilters | None = None,
+    ) -> 'pandas.DataFrame':
+        """Orders as a pandas DataFrame built column-wise from page data, needs pandas."""
+        from pb_admin import _frames as frames
+
+        return await frames.build_frame(
+            self._iter_list_pages(search, limit, filters=filters), FRAME_COLUMNS, limit
+        )
+
+    async def get_since(
+        self,
+        since_id: int | None = None,
+        since_created_at: datetime | None = None,
+        watermark: schemas.Watermark | None = None,
+    ) -> tuple[list[schemas.Order], schemas.Watermark]:
+        """Get orders newer than the watermark and the new watermark, see `_paging.get_since`.
+
+        `since_id` wins over `since_created_at`, a returned `watermark` can be passed back.
+        """
+        return await _paging.get_since(
+            lambda order_by: self._iter_list_pages(None, None, order_by, 'desc'),
+            lambda row: _fields.build(schemas.Order, self.session.trusted_reads, **row),
+            watermark or schemas.Watermark(last_id=since_id, last_created_at=since_created_at),
+        )
+
+    async def _iter_list_pages(
+        self,
+        search: str | None,
+        limit: int | None,
+        order_by: str = '',
+        order_by_direction: str = '',
+        filters: OrderFilters | None = None,
+    ) -> AsyncIterator[tuple[list[dict], int | None]]:
+        """Yield index pages as lists of Order fields, with the total row count if known."""
         params = {
             'perPage': 100,
             'search': search or '',
         }
-        while is_next_page and (limit is None or len(orders) < limit):
-            async with self.session.get(f'{self.site_url}/nova-api/orders', params=params) as resp:
-                resp.raise_for_status()
-                raw_page = await resp.json()
-
-                for row in raw_page['resources']:
-                    values = {}
-                    for cell in row['fields']:
-                        if cell['attribute'] == 'user':
-                            values['user_id'] = cell['belongsToId']
-                        elif cell['attribute'] == 'Orderable':
-                            if cell['resourceName'] == 'products':
-                                values['product_id'] = cell['morphToId']
-                            elif cell['resourceName'] == 'subscriptions':
-                                values['user_subscription_id'] = cell['morphToId']
-                        else:
-                            values[cell['attribute']] = cell['value']
-                    orders.append(
-                        schemas.Order(
-                            ident=values.get('id'),
-                            is_payed=True if values.get('payed') == 'Payed' else False,
-                            count=values.get('count'),
-                            price=values.get('price'),
-                            discounted_price=values.get('discounted_price'),
-                            user_id=values.get('user_id'),
-                            created_at=datetime.fromisoformat(values.get('created_at')) if values.get('created_at') else None,
-                            product_id=values.get('product_id'),
-                            user_subscription_id=values.get('user_subscription_id'),
-                            coupon=values.get('coupon'),
-                            is_extended_license=False if values.get('extended') == 'Standard' else True,
-                        )
-                    )
-
-                if raw_page.get('next_page_url'):
-                    parsed_url = urlparse(raw_page.get('next_page_url'))
-                    params.update(parse_qs(parsed_url.query))
-                else:
-                    is_next_page = False
-
-        return orders
+        if order_by:
+            params['orderBy'] = order_by
+            params['orderByDirection'] = order_by_direction
+        url = f'{self.site_url}/nova-api/orders'
+        if filters:
+            params.update(await filters.get_params(self.session, url))
+        count = 0
+        async for raw_page in self.session.iter_pages(url, params):
+            rows = [
+                _get_list_order_fields(values)
+                for values in LIST_FIELDS.parse_rows(raw_page['resources'])
+            ]
+            count += len(rows)
+            yield rows, raw_page.get('total')
+            if limit is not None and count >= limit:
+                return
 
     async def get(self, order_id: int) -> schemas.Order:
         async with self.session.get(
@@ -67,20 +150,7 @@ class Orders():
             resp.raise_for_status()
             raw_page = await resp.json()
 
-            values = {}
-            for cell in raw_page['resource']['fields']:
-                if cell['attribute'] == 'user':
-                    values['user_id'] = cell['belongsToId']
-                elif cell['attribute'] == 'Orderable':
-                    if cell['resourceName'] == 'products':
-                        values['product_id'] = cell['morphToId']
-                    elif cell['resourceName'] == 'subscriptions':
-                        values['user_subscription_id'] = cell['morphToId']
-                elif cell['attribute'] == 'coupon':
-                    values['coupon'] = cell['value']
-                    values['coupon_id'] = cell['belongsToId']
-                else:
-                    values[cell['attribute']] = cell['value']
+            values = ORDER_FIELDS.parse(raw_page['resource']['fields'])
 
             return schemas.Order(
                 ident=order_id,
@@ -98,13 +168,26 @@ class Orders():
                 coupon_id=values.get('coupon_id'),
             )
 
-    async def update(self, order: schemas.Order, is_lite: bool = False) -> schemas.Order | None:
+    async def update(
+        self,
+        order: schemas.Order,
+        is_lite: bool = False,
+        refetch: bool = False,
+        previous: schemas.Order | None = None,
+    ) -> schemas.Order | None:
+        """Update order, the submitted order is returned unless `refetch` asks for a re-read.
+
+        `previous` is the order as stored in the admin, e.g. as loaded or as returned
+        by the last update. It sets the `*_trashed` flags without reading the order first.
+        """
         if not self.edit_mode:
             raise ValueError('Edit mode is required')
         if not order.ident:
             raise ValueError('Order id is required')
+        if previous is not None and previous.ident != order.ident:
+            raise ValueError('Previous order must have the same id')
 
-        old_order = await self.get(order.ident)
+        old_order = previous or await self.get(order.ident)
 
         boundary = str(uuid.uuid4())
         headers = {
@@ -166,7 +249,10 @@ class Orders():
             resp.raise_for_status()
             if is_lite:
                 return
-        return await self.get(order.ident)
+            raw_order = await resp.json()
+        if refetch:
+            return await self.get(order.ident)
+        return merge_written(order, raw_order)
 
     def _cents_to_price(self, price: int | None) -> str | None:
         if price is None:
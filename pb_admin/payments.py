@@ -1,46 +1,106 @@
-from aiohttp import ClientSession
-from urllib.parse import urlparse, parse_qs
-from pb_admin import schemas
+from pb_admin._http import PbClient
+from pb_admin._filters import PaymentFilters
+from collections.abc import AsyncIterator
+from pb_admin import schemas, _fields, _paging, _records as records
 from datetime import datetime
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas
+
+# Column kinds of _frames.ColumnBuilder, enums become categoricals
+FRAME_COLUMNS = {
+    'ident': 'int',
+    'order_id': 'int',
+    'price_cent': 'int',
+    'status': schemas.PaymentStatus,
+    'created_at': 'datetime',
+}
 
 
 class Payments():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
-    async def get_list(self, search: str | None = None, limit: int | None = None) -> list[schemas.Payment]:
+    async def get_list(
+        self,
+        search: str | None = None,
+        limit: int | None = None,
+        as_records: bool = False,
+        filters: PaymentFilters | None = None,
+    ) -> list[schemas.Payment] | list[records.Record]:
+        """`as_records` returns compact slotted records, see `Record.to_model`."""
         payments = []
-        is_next_page = True
+        async for rows, _ in self._iter_list_pages(search, limit, filters=filters):
+            for row in rows:
+                payments.append(
+                    _fields.build(schemas.Payment, self.session.trusted_reads, as_records, **row)
+                )
+        return payments
+
+    async def to_frame(
+        self,
+        search: str | None = None,
+        limit: int | None = None,
+        filters: PaymentFilters | None = None,
+    ) -> 'pandas.DataFrame':
+        """Payments as a pandas DataFrame built column-wise from page data, needs pandas."""
+        from pb_admin import _frames as frames
+
+        return await frames.build_frame(
+            self._iter_list_pages(search, limit, filters=filters), FRAME_COLUMNS, limit
+        )
+
+    async def get_since(
+        self,
+        since_id: int | None = None,
+        since_created_at: datetime | None = None,
+        watermark: schemas.Watermark | None = None,
+    ) -> tuple[list[schemas.Payment], schemas.Watermark]:
+        """Get payments newer than the watermark and the new watermark, see `_paging.get_since`.
+
+        `since_id` wins over `since_created_at`, a returned `watermark` can be passed back.
+        """
+        return await _paging.get_since(
+            lambda order_by: self._iter_list_pages(None, None, order_by, 'desc'),
+            lambda row: _fields.build(schemas.Payment, self.session.trusted_reads, **row),
+            watermark or schemas.Watermark(last_id=since_id, last_created_at=since_created_at),
+        )
+
+    async def _iter_list_pages(
+        self,
+        search: str | None,
+        limit: int | None,
+        order_by: str = '',
+        order_by_direction: str = '',
+        filters: PaymentFilters | None = None,
+    ) -> AsyncIterator[tuple[list[dict], int | None]]:
+        """Yield index pages as lists of Payment fields, with the total row count if known."""
         params = {
             'perPage': 100,
             'search': search or '',
         }
-        while is_next_page and (limit is None or len(payments) < limit):
-            async with self.session.get(f'{self.site_url}/nova-api/payments', params=params) as resp:
-                resp.raise_for_status()
-                raw_page = await resp.json()
-
-                for row in raw_page['resources']:
-                    values = {}
-                    for cell in row['fields']:
-                        values[cell['attribute']] = cell['value']
-
-                    payments.append(
-                        schemas.Payment(
-                            ident=values.get('id'),
-                            order_id=int(values.get('order')) if values.get('order') else None,
-                            price_cent=int(values.get('price'))*100,
-                            status=schemas.PaymentStatus(values.get('status')),
-                            created_at=datetime.fromisoformat(values.get('created_at'))
-                        )
-                    )
-
-                if raw_page.get('next_page_url'):
-                    parsed_url = urlparse(raw_page.get('next_page_url'))
-                    params.update(parse_qs(parsed_url.query))
-                else:
-                    is_next_page = False
-
-        return payments
+        if order_by:
+            params['orderBy'] = order_by
+            params['orderByDirection'] = order_by_direction
+        url = f'{self.site_url}/nova-api/payments'
+        if filters:
+            params.update(await filters.get_params(self.session, url))
+        count = 0
+        async for raw_page in self.session.iter_pages(url, params):
+            rows = []
+            for row in raw_page['resources']:
+                values = {cell['attribute']: cell['value'] for cell in row['fields']}
+                rows.append({
+                    'ident': values.get('id'),
+                    'order_id': int(values.get('order')) if values.get('order') else None,
+                    'price_cent': int(values.get('price'))*100,
+                    'status': schemas.PaymentStatus(values.get('status')),
+                    'created_at': datetime.fromisoformat(values.get('created_at')),
+                })
+            count += len(rows)
+            yield rows, raw_page.get('total')
+            if limit is not None and count >= limit:
+                return
@@ -1,5 +1,8 @@
-from aiohttp import ClientSession, ClientResponse
-from pb_admin import schemas, _image_tools as image_tools
+from pb_admin._http import PbClient
+from pb_admin._fields import has_new_media, merge_written, skip_unchanged
+from pb_admin import schemas, _image_tools as image_tools, _fields
+from pb_admin._cache import single_flight
+from pb_admin._filters import ProductFilters
 from urllib.parse import urlparse, parse_qs
 import uuid
 from datetime import datetime, timezone
@@ -16,8 +19,61 @@ def get_id_form_options(value: str, options: list[dict]) -> int:
     return None
 
 
+def _parse_presentation(cell: dict, values: dict, context: dict) -> None:
+    values['presentation'] = []
+    for i, placeholder in enumerate(cell['value']):
+        placeholder_values = {}
+        for placeholder_value in placeholder['attributes']:
+            if placeholder_value.get('attribute') == 'image':
+                placeholder_values['image_id'] = get_id_form_options(
+                    placeholder_value['value'],
+                    placeholder_value['options']
+                )
+            else:
+                placeholder_values[placeholder_value['attribute']] = placeholder_value['value']
+        if i == 0 or placeholder_values['new_row'] is True:
+            values['presentation'].append([])
+        if placeholder.get('layout') == 'image':
+            values['presentation'][-1].append(
+                schemas.ProductLayoutImg(
+                    ident=str(placeholder['key']),
+                    img_id=placeholder_values['image_id'],
+                )
+            )
+        elif placeholder.get('layout') == 'video':
+            values['presentation'][-1].append(
+                schemas.ProductLayoutVideo(
+                    ident=placeholder['key'],
+                    title=placeholder_values['title'],
+                    link=placeholder_values['link'],
+                )
+            )
+
+
+LIST_FIELDS = _fields.FieldMap({
+    'created_at': _fields.value('created_at', lambda v: datetime.fromisoformat(v) if v else None),
+    'creator': _fields.belongs_to('creator_id'),
+    'category': _fields.belongs_to('category_id'),
+    'type': _fields.option_value('product_type', schemas.NewProductType),
+})
+
+PRODUCT_FIELDS = _fields.FieldMap({
+    'creator': _fields.belongs_to('creator_id'),
+    'category': _fields.belongs_to('category_id'),
+    'type': _fields.enum_value('product_type', schemas.NewProductType),
+    'thumbnail': _fields.media('thumbnail'),
+    'push_image': _fields.media('push_image'),
+    'images': _fields.media('images', many=True),
+    'presentation': _parse_presentation,
+    's3_path': _fields.when_component('file-field', _fields.value('s3_path')),
+    'vps_path': _fields.when_component('file-field', _fields.value('vps_path')),
+    'options': _fields.nested(),
+    'license': _fields.belongs_to('license'),
+})
+
+
 class Products():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
@@ -26,34 +82,29 @@ class Products():
         self,
         search: str = '',
         per_page: int = 100,
-        limit: int | None = None
+        limit: int | None = None,
+        filters: ProductFilters | None = None,
     ) -> list[schemas.NewProductLite]:
+        """Get list of products, see NovaFilters for `filters`."""
         products = []
         is_next_page = True
         params = {
             'perPage': str(per_page),
             'search': search,
         }
+        url = f'{self.site_url}/nova-api/products'
+        if filters:
+            params.update(await filters.get_params(self.session, url))
         while is_next_page and (limit is None or len(products) < limit):
-            async with self.session.get(f'{self.site_url}/nova-api/products', params=params) as resp:
+            async with self.session.get(url, params=params) as resp:
                 resp.raise_for_status()
                 raw_page = await resp.json()
 
-                for row in raw_page['resources']:
-                    values = {}
-                    for cell in row['fields']:
-                        if cell.get('attribute') == 'creator':
-                            values['creator_id'] = cell['belongsToId']
-                        elif cell.get('attribute') == 'category':
-                            values['category_id'] = cell['belongsToId']
-                        elif cell.get('attribute') == 'type':
-                            values['product_type'] = schemas.NewProductType(
-                                [o['value'] for o in cell['options'] if o['label'] == cell['value']][0]
-                            )
-                        else:
-                            values[cell['attribute']] = cell['value']
+                for values in LIST_FIELDS.parse_rows(raw_page['resources']):
                     products.append(
-                        schemas.NewProductLite(
+                        _fields.build(
+                            schemas.NewProductLite,
+                            self.session.trusted_reads,
                             ident=values.get('id'),
                             title=values.get('title'),
                             product_type=values.get('product_type'),
@@ -71,6 +122,7 @@ class Products():
                     is_next_page = False
         return products
 
+    @single_flight('products')
     async def get(self, product_ident: int, with_login_downloads: bool = False) -> schemas.NewProduct:
         """Get product by id."""
         params = {
@@ -86,120 +138,53 @@ class Products():
         ) as resp:
             resp.raise_for_status()
             raw_product = await resp.json()
-            raw_product_fields = raw_product['fields'][0]['fields']
-            values = {}
-            for cell in raw_product_fields:
-                if cell.get('attribute') == 'creator':
-                    values['creator_id'] = cell['belongsToId']
-                elif cell.get('attribute') == 'category':
-                    values['category_id'] = cell['belongsToId']
-                elif cell.get('attribute') == 'type':
-                    values['product_type'] = schemas.NewProductType(cell['value'])
-                elif cell.get('attribute') in ['thumbnail', 'push_image']:
-                    if not cell['value']:
-                        values[cell['attribute']] = None
-                        continue
-                    values[cell['attribute']] = schemas.Image(
-                        ident=cell['value'][0]['id'],
-                        mime_type=cell['value'][0]['mime_type'],
-                        original_url=cell['value'][0]['original_url'],
-                        file_name=cell['value'][0]['file_name'],
-                        alt=cell['value'][0]['custom_properties'].get('alt') if cell['value'][0]['custom_properties'] else None,
-                    )
-                elif cell.get('attribute') == 'images':
-                    values['images'] = [schemas.Image(
-                        ident=c['id'],
-                        mime_type=c['mime_type'],
-                        original_url=c['original_url'],
-                        file_name=c['file_name'],
-                        alt=c['custom_properties'].get('alt') if c['custom_properties'] else None,
-                    ) for c in cell['value']]
-                elif cell.get('attribute') == 'presentation':
-                    values['presentation'] = []
-                    for i, placeholder in enumerate(cell['value']):
-                        placeholder_values = {}
-                        for placeholder_value in placeholder['attributes']:
-                            if placeholder_value.get('attribute') == 'image':
-                                placeholder_values['image_id'] = get_id_form_options(
-                                    placeholder_value['value'],
-                                    placeholder_value['options']
-                                )
-                            else:
-                                placeholder_values[placeholder_value['attribute']] = placeholder_value['value']
-                        if i == 0 or placeholder_values['new_row'] is True:
-                            values['presentation'].append([])
-                        if placeholder.get('layout') == 'image':
-                            values['presentation'][-1].append(
-                                schemas.ProductLayoutImg(
-                                    ident=str(placeholder['key']),
-                                    img_id=placeholder_values['image_id'],
-                                )
-                            )
-                        elif placeholder.get('layout') == 'video':
-                            values['presentation'][-1].append(
-                                schemas.ProductLayoutVideo(
-                                    ident=placeholder['key'],
-                                    title=placeholder_values['title'],
-                                    link=placeholder_values['link'],
-                                )
-                            )
-
-                elif cell.get('attribute') in ['s3_path', 'vps_path']:
-                    if cell.get('component') != 'file-field':
-                        continue
-                    values[cell['attribute']] = cell['value']
-                elif cell.get('attribute') == 'options':
-                    for opt_field in cell['fields']:
-                        values[opt_field['attribute']] = opt_field['value']
-                elif cell.get('attribute') == 'license':
-                    values['license'] = cell['belongsToId']
-                else:
-                    values[cell['attribute']] = cell['value']
+        raw_product_fields = raw_product['fields'][0]['fields']
+        values = PRODUCT_FIELDS.parse(raw_product_fields)
 
-            values['tag_ids'] = await self._get_tag_ids(product_ident)
-            values['font_ids'] = await self._get_fonts(product_ident)
-            product = schemas.NewProduct(
-                ident=str(product_ident),
-                title=values.get('title'),
-                slug=values.get('slug'),
-                created_at=values.get('created_at'),
-                expires_at=values.get('expires_at'),
-                time_limited_subtitle=values.get('time_limited_subtitle'),
-                is_special=values.get('special'),
-                is_live=values.get('status'),
-                is_revenue_share=values.get('is_revenue_share'),
-                product_type=values.get('product_type'),
-                only_registered_download=values.get('only_registered_download'),
-                creator_id=values.get('creator_id'),
-                size=values.get('size'),
-                category_id=values.get('category_id'),
-                excerpt=values.get('excerpt') or '',
-                description=values.get('description'),
-                price_commercial_cent=self._price_to_cents(values.get('price_commercial')),
-                price_extended_cent=self._price_to_cents(values.get('price_extended')),
-                price_commercial_sale_cent=self._price_to_cents(values.get('price_commercial_sale')),
-                price_extended_sale_cent=self._price_to_cents(values.get('price_extended_sale')),
-                thumbnail=values.get('thumbnail'),
-                push_image=values.get('push_image'),
-                image_border=values.get('image_border', False),
-                images=values.get('images'),
-                presentation=values.get('presentation'),
-                vps_path=values.get('vps_path'),
-                s3_path=values.get('s3_path'),
-                formats=values.get('formats'),
-                tags_ids=values.get('tag_ids'),
-                font_ids=values.get('font_ids'),
-                custom_btn_text=values.get('custom_btn_text'),
-                custom_btn_url=values.get('custom_btn_url'),
-                meta_title=values.get('meta_title'),
-                meta_description=values.get('meta_description'),
-                meta_keywords=values.get('meta_keywords'),
-                count_downloads_unique=values.get('count_downloads_unique'),
-                count_downloads=values.get('count_downloads'),
-                public_licence_id=values.get('license'),
-            )
+        values['tag_ids'] = await self._get_tag_ids(product_ident)
+        values['font_ids'] = await self._get_fonts(product_ident)
+        product = schemas.NewProduct(
+            ident=str(product_ident),
+            title=values.get('title'),
+            slug=values.get('slug'),
+            created_at=values.get('created_at'),
+            expires_at=values.get('expires_at'),
+            time_limited_subtitle=values.get('time_limited_subtitle'),
+            is_special=values.get('special'),
+            is_live=values.get('status'),
+            is_revenue_share=values.get('is_revenue_share'),
+            product_type=values.get('product_type'),
+            only_registered_download=values.get('only_registered_download'),
+            creator_id=values.get('creator_id'),
+            size=values.get('size'),
+            category_id=values.get('category_id'),
+            excerpt=values.get('excerpt') or '',
+            description=values.get('description'),
+            price_commercial_cent=self._price_to_cents(values.get('price_commercial')),
+            price_extended_cent=self._price_to_cents(values.get('price_extended')),
+            price_commercial_sale_cent=self._price_to_cents(values.get('price_commercial_sale')),
+            price_extended_sale_cent=self._price_to_cents(values.get('price_extended_sale')),
+            thumbnail=values.get('thumbnail'),
+            push_image=values.get('push_image'),
+            image_border=values.get('image_border', False),
+            images=values.get('images'),
+            presentation=values.get('presentation'),
+            vps_path=values.get('vps_path'),
+            s3_path=values.get('s3_path'),
+            formats=values.get('formats'),
+            tags_ids=values.get('tag_ids'),
+            font_ids=values.get('font_ids'),
+            custom_btn_text=values.get('custom_btn_text'),
+            custom_btn_url=values.get('custom_btn_url'),
+            meta_title=values.get('meta_title'),
+            meta_description=values.get('meta_description'),
+            meta_keywords=values.get('meta_keywords'),
+            count_downloads_unique=values.get('count_downloads_unique'),
+            count_downloads=values.get('count_downloads'),
+            public_licence_id=values.get('license'),
+        )
         if not with_login_downloads:
-            return product
+            return product.mark_loaded()
 
         is_next_page = True
         params = {
@@ -231,14 +216,28 @@ class Products():
                     product.login_downloads = int(raw_data['total'])
                     is_next_page = False        
 
-        return product
+        return product.mark_loaded()
 
-    async def update(self, product: schemas.NewProduct, is_lite: bool = False) -> schemas.NewProduct | None:
-        """Update product."""
+    async def update(
+        self,
+        product: schemas.NewProduct,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.NewProduct | None:
+        """Update product.
+
+        Returns the submitted product with id and timestamps of the response,
+        re-read from the admin with `refetch` or when new images were uploaded.
+
+        A loaded model without changes is returned without a request and
+        reports it in `is_update_skipped`.
+        """
         if not self.edit_mode:
             raise ValueError('Edit mode is required')
         if not product.ident:
             raise ValueError('Product id is required')
+        if skip_unchanged(product, self.session.stats, f'Product {product.ident}'):
+            return None if is_lite else product
         boundary = str(uuid.uuid4())
         headers = {
             'Content-Type': f'multipart/form-data; boundary={boundary}',
@@ -313,10 +312,18 @@ class Products():
             resp.raise_for_status()
             if is_lite:
                 return
-        return await self.get(product.ident)
+            raw_product = await resp.json()
+        if refetch or has_new_media(product):
+            return await self.get(product.ident)
+        return merge_written(product, raw_product)
 
-    async def create(self, product: schemas.NewProduct, is_lite: bool = False) -> schemas.NewProduct | None:
-        """Create product."""
+    async def create(
+        self,
+        product: schemas.NewProduct,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.NewProduct | None:
+        """Create product, `refetch` as in `update`."""
         if not self.edit_mode:
             raise ValueError('Edit mode is required')
         if product.ident:
@@ -391,9 +398,9 @@ class Products():
         ) as resp:
             resp.raise_for_status()
             new_product_raw = await resp.json()
-            new_product = await self.get(new_product_raw['id'])
-            new_product.presentation = product.presentation
-        return await self.update(new_product, is_lite=is_lite)
+        new_product = await self.get(new_product_raw['id'])
+        new_product.presentation = product.presentation
+        return await self.update(new_product, is_lite=is_lite, refetch=refetch)
 
     async def delete(self, product_ident: int) -> None:
         """Delete product."""
@@ -1,6 +1,7 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas, _image_tools as image_tools, _config as config
+from pb_admin._cache import cached
 from loguru import logger
 from requests_toolbelt import MultipartEncoder
 import uuid
@@ -8,11 +9,12 @@ from datetime import datetime
 
 
 class PublicLicences():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
+    @cached('public_licences')
     async def get_list(self, search: str = None, limit: int | None = None) -> list[schemas.Tag]:
         """"""
         licenses = []
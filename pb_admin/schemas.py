@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, PrivateAttr
+from typing import Optional, Self
+from datetime import datetime, timezone
 from enum import Enum
 
 
@@ -54,6 +54,38 @@ class Subscription(BaseModel):
     cancel_reason: Optional[str] = None
 
 
+class TrackedModel(BaseModel):
+    """Model that remembers its state as loaded from the admin."""
+    _loaded_state: dict | None = PrivateAttr(default=None)
+    _update_skipped: bool = PrivateAttr(default=False)
+
+    def mark_loaded(self) -> Self:
+        self._loaded_state = self.model_dump()
+        return self
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_state is not None
+
+    def get_changed_fields(self) -> set[str]:
+        """Fields changed since loading, all fields for a model not loaded from the admin."""
+        if self._loaded_state is None:
+            return set(type(self).model_fields)
+        return {
+            name for name, value in self.model_dump().items()
+            if self._loaded_state.get(name) != value
+        }
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self.get_changed_fields())
+
+    @property
+    def is_update_skipped(self) -> bool:
+        """The last update of this model was not sent, it had no changes."""
+        return self._update_skipped
+
+
 class Image(BaseModel):
     ident: Optional[int] = None
     mime_type: Optional[str] = None
@@ -75,7 +107,7 @@ class Category(BaseModel):
     image_retina: Optional[Image] = None
 
 
-class Tag(BaseModel):
+class Tag(TrackedModel):
     ident: Optional[int] = None
     name: Optional[str] = None
     title: Optional[str] = None
@@ -89,6 +121,27 @@ class Tag(BaseModel):
     is_group: bool = False
 
 
+class TagCategoryIndex(BaseModel):
+    tag_category_ids: dict[int, list[int]] = {}
+    category_tag_ids: dict[int, list[int]] = {}
+
+
+class CategorySync(BaseModel):
+    """Tags actually attached and detached, and tag id -> error of failed writes."""
+    category_id: int
+    attached_tag_ids: list[int] = []
+    detached_tag_ids: list[int] = []
+    failed: dict[int, str] = {}
+
+
+class PolicyReport(BaseModel):
+    checked: int = 0
+    skipped: int = 0
+    changed_tag_ids: list[int] = []
+    updated_tag_ids: list[int] = []
+    failed: dict[int, str] = {}
+
+
 class FeatureShort(BaseModel):
     title: str
     value: str
@@ -196,6 +249,53 @@ class Order(BaseModel):
     coupon_id: Optional[int] = None
 
 
+class Watermark(BaseModel):
+    """Sync position of an append-only resource.
+
+    `last_id` wins when set. A created_at-only watermark also keeps the ids
+    synced at `last_created_at`, so rows sharing that timestamp are deduped.
+    """
+    last_id: int | None = None
+    last_created_at: datetime | None = None
+    last_created_ids: list[int] = []
+
+    def is_reached(self, ident: int | None, created_at: datetime | None) -> bool:
+        """Row sorts below the watermark, paging in descending order can stop."""
+        if self.last_id is not None:
+            return ident is not None and ident <= self.last_id
+        if self.last_created_at is not None and created_at is not None:
+            return _as_utc(created_at) < _as_utc(self.last_created_at)
+        return False
+
+    def is_synced(self, ident: int | None, created_at: datetime | None) -> bool:
+        """Row shares `last_created_at` with an already synced row of the same id."""
+        if self.last_id is not None or self.last_created_at is None or created_at is None:
+            return False
+        return (
+            _as_utc(created_at) == _as_utc(self.last_created_at)
+            and ident in self.last_created_ids
+        )
+
+    def advance(self, ident: int | None, created_at: datetime | None) -> None:
+        by_created_at = self.last_id is None and self.last_created_at is not None
+        if ident is not None and not by_created_at and (
+            self.last_id is None or ident > self.last_id
+        ):
+            self.last_id = ident
+        if created_at is None:
+            return
+        if self.last_created_at is None or _as_utc(created_at) > _as_utc(self.last_created_at):
+            self.last_created_at = created_at
+            self.last_created_ids = []
+        if _as_utc(created_at) == _as_utc(self.last_created_at) and ident is not None:
+            if ident not in self.last_created_ids:
+                self.last_created_ids.append(ident)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
 class ArticleType(str, Enum):
     text = 'text'
     card = 'card'
@@ -295,7 +395,7 @@ class CreatorLite(BaseModel):
     link: str | None = None
 
 
-class Creator(CreatorLite):
+class Creator(CreatorLite, TrackedModel):
     ident: int | None = None
     description: str
     avatar: Image | None = None
@@ -312,7 +412,7 @@ class NewProductLite(BaseModel):
     is_special: bool
 
 
-class NewProduct(NewProductLite):
+class NewProduct(NewProductLite, TrackedModel):
     ident: int | None = None
     slug: str | None
     expires_at: datetime | None = None
@@ -398,7 +498,7 @@ class BannerLite(BaseModel):
     images_retina: list[Image] = []
     weight: int = 0
 
-class Banner(BannerLite):
+class Banner(BannerLite, TrackedModel):
     link: str | None = None
     open_in_new_tab: bool = False
     color: str | None = None
@@ -1,4 +1,4 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas
 from datetime import datetime
@@ -6,7 +6,7 @@ import json
 
 
 class Subscriptions():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
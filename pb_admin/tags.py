@@ -1,55 +1,72 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas, _image_tools as image_tools, _config as config
+from pb_admin._cache import DEFAULT_TTLS, cached, cache_key, single_flight
+from pb_admin._tag_index import TagIndex
+from pb_admin._fields import has_new_media, merge_written, skip_unchanged
 from loguru import logger
+from aiohttp import ClientResponseError
+import asyncio
 from requests_toolbelt import MultipartEncoder
 import uuid
+import time
 from datetime import datetime
+from collections.abc import AsyncIterator, Callable
+
+# Tag fields written by fill_scheme_by_policy
+POLICY_FIELDS = ('name', 'title', 'meta_title', 'meta_description')
 
 
 class Tags():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
+        self._category_page_map: dict[int, int] | None = None
+        self._category_page_map_at = 0.0
+        self._index: TagIndex | None = None
 
     async def get_list(self, search: str = None, limit: int | None = None) -> list[schemas.Tag]:
         """Get list of all tags in short version id, name, title, description, meta_title, meta_description, no_index."""
         tags = []
-        is_next_page = True
+        async for page_tags in self._iter_list_pages(search, limit):
+            tags.extend(page_tags)
+        return tags
+
+    async def _iter_list_pages(
+        self,
+        search: str | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[list[schemas.Tag]]:
+        """Yield index pages as lists of short tags."""
         params = {
             'perPage': 100,
             'search': search or '',
         }
-        while is_next_page and (limit is None or len(tags) < limit):
-            async with self.session.get(f'{self.site_url}/nova-api/tags', params=params) as resp:
-                resp.raise_for_status()
-                raw_page = await resp.json()
-
-                for row in raw_page['resources']:
-                    values = {cell['attribute']: cell['value'] for cell in row['fields']}
-                    tags.append(
-                        schemas.Tag(
-                            ident=values.get('id'),
-                            name=values.get('name'),
-                            title=values.get('title'),
-                            description=values.get('description'),
-                            meta_title=values.get('meta_title'),
-                            meta_description=values.get('meta_description'),
-                            no_index=values.get('no_index'),
-                            is_group=values.get('group_size', False),
-                        )
+        count = 0
+        async for raw_page in self.session.iter_pages(f'{self.site_url}/nova-api/tags', params):
+            tags = []
+            for row in raw_page['resources']:
+                values = {cell['attribute']: cell['value'] for cell in row['fields']}
+                tags.append(
+                    schemas.Tag(
+                        ident=values.get('id'),
+                        name=values.get('name'),
+                        title=values.get('title'),
+                        description=values.get('description'),
+                        meta_title=values.get('meta_title'),
+                        meta_description=values.get('meta_description'),
+                        no_index=values.get('no_index'),
+                        is_group=values.get('group_size', False),
                     )
+                )
+            count += len(tags)
+            yield tags
+            if limit is not None and count >= limit:
+                return
 
-                if raw_page.get('next_page_url'):
-                    parsed_url = urlparse(raw_page.get('next_page_url'))
-                    params.update(parse_qs(parsed_url.query))
-
-                else:
-                    is_next_page = False
-
-        return tags
-
+    @single_flight('tags')
+    @cached('tags')
     async def get(self, tag_ident: int) -> schemas.Tag:
         """Get tag by id."""
         async with self.session.get(f'{self.site_url}/nova-api/tags/{tag_ident}') as resp:
@@ -68,17 +85,10 @@ class Tags():
             else:
                 img = None
 
-        async with self.session.get(
-            f'{self.site_url}/nova-vendor/nova-attach-many/tags/{values["id"]}/attachable/tags'
-        )  as resp:
-            raw_relevanted_tags = await resp.json()
-            relevanted_tags_ids = list(set(raw_relevanted_tags['selected']))
-
-        async with self.session.get(
-            f'{self.site_url}/nova-vendor/nova-attach-many/tags/{values["id"]}/attachable/subtags'
-        ) as resp:
-            raw_sub_tags = await resp.json()
-            sub_tags_ids = list(set(raw_sub_tags['selected']))
+        relevanted_tags_ids, sub_tags_ids = await asyncio.gather(
+            self._get_attached_ids(values['id'], 'tags'),
+            self._get_attached_ids(values['id'], 'subtags'),
+        )
 
         return schemas.Tag(
             ident=values['id'],
@@ -92,10 +102,32 @@ class Tags():
             relevanted_tags_ids=relevanted_tags_ids,
             sub_tags_ids=sub_tags_ids,
             is_group=True if sub_tags_ids else False,
-        )
+        ).mark_loaded()
+
+    async def get_many(self, tag_idents: list[int], max_concurrency: int = 8) -> list[schemas.Tag]:
+        """Get tags by ids in the same order, at most `max_concurrency` tags in flight."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def get(tag_ident: int) -> schemas.Tag:
+            async with semaphore:
+                return await self.get(tag_ident)
 
-    async def create(self, tag: schemas.Tag, is_lite: bool = False) -> schemas.Tag | None:
-        """Create new tag."""
+        return list(await asyncio.gather(*[get(tag_ident) for tag_ident in tag_idents]))
+
+    async def _get_attached_ids(self, tag_ident: int, relation: str) -> list[int]:
+        async with self.session.get(
+            f'{self.site_url}/nova-vendor/nova-attach-many/tags/{tag_ident}/attachable/{relation}'
+        ) as resp:
+            raw_attached = await resp.json()
+            return list(set(raw_attached['selected']))
+
+    async def create(
+        self,
+        tag: schemas.Tag,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.Tag | None:
+        """Create new tag, `refetch` as in `update`."""
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
         boundary = str(uuid.uuid4())
@@ -132,15 +164,21 @@ class Tags():
             allow_redirects=False
         ) as resp:
             resp.raise_for_status()
-            if resp.status == 201:
-                if is_lite:
-                    return
-                response_json = await resp.json()
-                return await self.get(response_json['resource']['id'])
-            else:
+            if resp.status != 201:
                 error_text = await resp.text()
                 logger.error(error_text)
                 raise Exception(error_text)
+            response_json = await resp.json()
+        if is_lite:
+            self._index_tag(tag.model_copy(update={'ident': response_json['resource']['id']}))
+            return
+        if refetch or has_new_media(tag):
+            # Cached as a side effect, so the next get of the new tag is free
+            new_tag = await self.get(response_json['resource']['id'])
+        else:
+            new_tag = merge_written(tag, response_json)
+        self._index_tag(new_tag)
+        return new_tag
 
     async def delete(self, tag_ident: int) -> None:
         """Delete tag by id."""
@@ -155,13 +193,30 @@ class Tags():
 
         async with self.session.delete(f'{self.site_url}/nova-api/tags', params=params, headers=headers) as resp:
             resp.raise_for_status()
+        self._forget(tag_ident)
+        if self._index is not None:
+            self._index.remove(tag_ident)
+
+    async def update(
+        self,
+        updated_tag: schemas.Tag,
+        is_lite: bool = False,
+        refetch: bool = False,
+    ) -> schemas.Tag | None:
+        """Update tag.
 
-    async def update(self, updated_tag: schemas.Tag, is_lite: bool = False) -> schemas.Tag | None:
-        """Update tag."""
+        Returns the submitted tag with id of the response, re-read from the
+        admin with `refetch` or when a new image was uploaded.
+
+        A loaded model without changes is returned without a request and
+        reports it in `is_update_skipped`.
+        """
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
         if not updated_tag.ident:
             raise Exception('Tag id is required.')
+        if skip_unchanged(updated_tag, self.session.stats, f'Tag {updated_tag.ident}'):
+            return None if is_lite else updated_tag
         boundary = str(uuid.uuid4())
         if updated_tag.image and not updated_tag.image.ident:
             updated_tag.image = await image_tools.prepare_image(updated_tag.image, config.TAG_IMG_SIZE, config.TAG_IMG_SIZE)
@@ -208,22 +263,26 @@ class Tags():
             params=params
         ) as resp:
             resp.raise_for_status()
-            if resp.status == 200:
-                if is_lite:
-                    return
-                raw_tag = await resp.json()
-                return await self.get(raw_tag['resource']['id'])
-            else:
+            self._forget(updated_tag.ident)
+            if resp.status != 200:
                 logger.error(resp.text)
                 raise Exception(resp.text)
+            if is_lite:
+                self._index_tag(updated_tag.model_copy())
+                return
+            raw_tag = await resp.json()
+        if refetch or has_new_media(updated_tag):
+            tag = await self.get(raw_tag['resource']['id'])
+        else:
+            tag = merge_written(updated_tag, raw_tag)
+        self._index_tag(tag)
+        return tag
 
 
     async def get_all_tag_ids_in_category(self, category_ident: int) -> list[int]:
         """Get all tag ids in category."""
         tag_ids = []
-        page_id = config.CATEGORY_PAGE_MAP.get(category_ident)
-        if not page_id:
-            raise Exception(f'Category id {category_ident} not found in config.')
+        page_id = await self._get_page_id(category_ident)
         is_next_page = True
         params = {
             'search': '',
@@ -254,14 +313,30 @@ class Tags():
                     is_next_page = False
         return tag_ids
 
+    @single_flight('tag_categories')
+    @cached('tag_categories')
+    async def build_category_index(self, max_concurrency: int = 8) -> schemas.TagCategoryIndex:
+        """Get tag <-> category index of all categories, pages are fetched concurrently."""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def get_tag_ids(category_ident: int) -> list[int]:
+            async with semaphore:
+                return await self.get_all_tag_ids_in_category(category_ident)
+
+        category_idents = list(await self._load_category_page_map())
+        results = await asyncio.gather(*[get_tag_ids(ident) for ident in category_idents])
+        index = schemas.TagCategoryIndex()
+        for category_ident, tag_ids in zip(category_idents, results):
+            index.category_tag_ids[category_ident] = sorted(set(tag_ids))
+            for tag_ident in index.category_tag_ids[category_ident]:
+                index.tag_category_ids.setdefault(tag_ident, []).append(category_ident)
+        return index
 
     async def add_to_category(self, tag_ident: int, category_ident: int) -> None:
         """Add tag to category."""
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
-        page_id = config.CATEGORY_PAGE_MAP.get(category_ident)
-        if not page_id:
-            raise Exception(f'Category id {category_ident} not found in config.')
+        page_id = await self._get_page_id(category_ident)
         boundary = str(uuid.uuid4())
         headers = {
             'Content-Type': f'multipart/form-data; boundary={boundary}',
@@ -299,14 +374,135 @@ class Tags():
                     logger.error(error['message'])
                     return
             resp.raise_for_status()
+        if self.session.cache:
+            self.session.cache.clear('tag_categories')
 
     async def remove_from_category(self, tag_ident: int, category_ident: int) -> None:
         """Remove tag from category."""
         if not self.edit_mode:
             raise Exception('Edit mode is required.')
-        page_id = config.CATEGORY_PAGE_MAP.get(category_ident)
+        page_id = await self._get_page_id(category_ident)
+        await self._detach_from_page(page_id, [tag_ident])
+
+    async def sync_category(
+        self,
+        category_ident: int,
+        desired_tag_ids: list[int],
+        max_concurrency: int = 8,
+    ) -> schemas.CategorySync:
+        """Make category tags equal to `desired_tag_ids`, sending only the difference.
+
+        Attaches run concurrently, detaches go in batches of 100 per request.
+        A failed write is recorded in `failed` and does not stop the others.
+        """
+        if not self.edit_mode:
+            raise Exception('Edit mode is required.')
+        page_id = await self._get_page_id(category_ident)
+        current_tag_ids = set(await self.get_all_tag_ids_in_category(category_ident))
+        desired = set(desired_tag_ids)
+        to_attach = sorted(desired - current_tag_ids)
+        to_detach = sorted(current_tag_ids - desired)
+        result = schemas.CategorySync(category_id=category_ident)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def attach(tag_ident: int) -> None:
+            async with semaphore:
+                try:
+                    await self.add_to_category(tag_ident, category_ident)
+                except Exception as e:
+                    logger.error(f'Attach of tag {tag_ident} to category failed: {e}')
+                    result.failed[tag_ident] = str(e)
+                    return
+            result.attached_tag_ids.append(tag_ident)
+
+        async def detach(tag_idents: list[int]) -> None:
+            async with semaphore:
+                try:
+                    await self._detach_from_page(page_id, tag_idents)
+                except Exception as e:
+                    logger.error(f'Detach of tags from category {category_ident} failed: {e}')
+                    result.failed.update({tag_ident: str(e) for tag_ident in tag_idents})
+                    return
+            result.detached_tag_ids.extend(tag_idents)
+
+        batch_size = 100
+        tasks = [asyncio.ensure_future(attach(tag_ident)) for tag_ident in to_attach]
+        tasks += [
+            asyncio.ensure_future(detach(to_detach[i:i + batch_size]))
+            for i in range(0, len(to_detach), batch_size)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # The caller was cancelled, do not leave writes running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        result.attached_tag_ids.sort()
+        result.detached_tag_ids.sort()
+        return result
+
+    @single_flight('category_pages')
+    @cached('category_pages')
+    async def get_category_page_map(self) -> dict[int, int]:
+        """Get category id -> page id map discovered from the pages resource."""
+        return await self._discover_category_page_map()
+
+    async def _discover_category_page_map(self) -> dict[int, int]:
+        """Pages linked to a category win over config, config fills the gaps."""
+        page_map = dict(config.CATEGORY_PAGE_MAP)
+        params = {
+            'perPage': 100,
+            'search': '',
+        }
+        url = f'{self.site_url}/nova-api/pages'
+        async for raw_page in self.session.iter_pages(url, params):
+            for row in raw_page['resources']:
+                for cell in row['fields']:
+                    if cell.get('resourceName') == 'categories' and cell.get('belongsToId'):
+                        page_map[int(cell['belongsToId'])] = row['id']['value']
+        return page_map
+
+    async def _load_category_page_map(self, refresh: bool = False) -> dict[int, int]:
+        """Discovered map, or config alone when the pages resource is not accessible.
+
+        The config fallback is neither cached nor kept on the instance, so the
+        next call discovers pages again.
+        """
+        try:
+            if refresh:
+                page_map = await self._discover_category_page_map()
+                if self.session.cache:
+                    self.session.cache.set(
+                        'category_pages', cache_key('get_category_page_map'), page_map
+                    )
+            else:
+                page_map = await self.get_category_page_map()
+        except ClientResponseError as e:
+            if e.status not in (403, 404):
+                raise
+            logger.warning(f'Cannot list category pages, using config: {e}')
+            return dict(config.CATEGORY_PAGE_MAP)
+        self._category_page_map = page_map
+        self._category_page_map_at = time.monotonic()
+        return page_map
+
+    async def _get_page_id(self, category_ident: int) -> int:
+        """Page of category, the map is rediscovered once when the category is unknown."""
+        page_map = self._category_page_map
+        if (
+            page_map is None
+            or time.monotonic() - self._category_page_map_at > DEFAULT_TTLS['category_pages']
+        ):
+            page_map = await self._load_category_page_map()
+        if category_ident not in page_map:
+            page_map = await self._load_category_page_map(refresh=True)
+        page_id = page_map.get(category_ident)
         if not page_id:
-            raise Exception(f'Category id {category_ident} not found in config.')
+            raise Exception(f'Category id {category_ident} not found in pages.')
+        return page_id
+
+    async def _detach_from_page(self, page_id: int, tag_idents: list[int]) -> None:
         headers = {
             'X-CSRF-TOKEN': self.session.cookie_jar.filter_cookies(self.site_url).get('XSRF-TOKEN').value,
             'X-XSRF-TOKEN': self.session.cookie_jar.filter_cookies(self.site_url).get('XSRF-TOKEN').value,
@@ -320,7 +516,7 @@ class Tags():
             'viaResource': 'pages',
             'viaResourceId': str(page_id),
             'viaRelationship': 'tags',
-            'resources[]': str(tag_ident),
+            'resources[]': [str(tag_ident) for tag_ident in tag_idents],
         }
         async with self.session.delete(
             f'{self.site_url}/nova-api/tags/detach',
@@ -328,8 +524,94 @@ class Tags():
             headers=headers,
             allow_redirects=False
         ) as resp:
-            text = await resp.text()
             resp.raise_for_status()
+        if self.session.cache:
+            self.session.cache.clear('tag_categories')
+
+    async def get_index(self, refresh: bool = False) -> TagIndex:
+        """Get name index of all tags, built from one listing and kept current by
+        create, update and delete of this session.
+        """
+        if self._index is None or refresh:
+            self._index = TagIndex(await self.get_list())
+        return self._index
+
+    def _index_tag(self, tag: schemas.Tag) -> None:
+        if self._index is not None:
+            self._index.add(tag)
+
+    def _forget(self, tag_ident: int) -> None:
+        """Drop cached `get` of a tag changed through this session."""
+        if self.session.cache:
+            self.session.cache.delete('tags', cache_key('get', tag_ident))
+
+    async def apply_policy(
+        self,
+        max_concurrency: int = 8,
+        dry_run: bool = False,
+        on_progress: Callable[[schemas.PolicyReport], None] | None = None,
+    ) -> schemas.PolicyReport:
+        """Apply `fill_scheme_by_policy` to all tags, writing only tags it changes.
+
+        Tags are streamed from the index and compared on POLICY_FIELDS, a changed
+        tag is read in full and updated with the policy fields only.
+        `on_progress` gets the report after every index page and at the end.
+        """
+        if not self.edit_mode and not dry_run:
+            raise Exception('Edit mode is required.')
+        report = schemas.PolicyReport()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = []
+
+        async def push(tag: schemas.Tag, policy_tag: schemas.Tag) -> None:
+            async with semaphore:
+                try:
+                    full_tag = await self.get(tag.ident)
+                    full_tag = full_tag.model_copy(
+                        update={field: getattr(policy_tag, field) for field in POLICY_FIELDS}
+                    )
+                    await self.update(full_tag, is_lite=True)
+                except Exception as e:
+                    logger.error(f'Policy update of tag {tag.ident} failed: {e}')
+                    report.failed[tag.ident] = str(e)
+                    return
+            if not full_tag.is_update_skipped:
+                report.updated_tag_ids.append(tag.ident)
+            else:
+                # The full tag already complies, the index row was stale
+                report.skipped += 1
+
+        try:
+            async for tags in self._iter_list_pages():
+                for tag in tags:
+                    report.checked += 1
+                    try:
+                        policy_tag = self.fill_scheme_by_policy(tag)
+                    except Exception as e:
+                        report.failed[tag.ident] = str(e)
+                        continue
+                    if all(getattr(tag, f) == getattr(policy_tag, f) for f in POLICY_FIELDS):
+                        report.skipped += 1
+                        continue
+                    report.changed_tag_ids.append(tag.ident)
+                    if dry_run:
+                        continue
+                    tasks.append(asyncio.ensure_future(push(tag, policy_tag)))
+                if on_progress:
+                    on_progress(report)
+            await asyncio.gather(*tasks)
+        finally:
+            # Paging failed or the caller was cancelled, do not leave updates running
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info(
+            f'Tag policy: {report.checked} checked, {report.skipped} compliant, '
+            f'{len(report.updated_tag_ids)} updated, {len(report.failed)} failed'
+        )
+        if on_progress:
+            on_progress(report)
+        return report
 
     @staticmethod
     def fill_scheme_by_policy(tag: schemas.Tag) -> schemas.Tag:
@@ -1,11 +1,11 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from pb_admin import schemas
 import uuid
 from requests_toolbelt import MultipartEncoder
 
 
 class Tools():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
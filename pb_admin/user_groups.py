@@ -1,4 +1,4 @@
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
 from pb_admin import schemas
 import uuid
@@ -7,7 +7,7 @@ from asyncio import sleep
 
 
 class UserGroups():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
@@ -135,7 +135,8 @@ class UserGroups():
                 except Exception as e:
                     text = await resp.text()
                     print(f'Error attaching user {user_id} to group {user_group_ident}: {e}\nResponse text: {text}')
-            await sleep(0.1)  # To avoid overwhelming the server
+            if not self.session.get_limiter('POST'):
+                await sleep(0.1)  # To avoid overwhelming the server
         
         return True
     
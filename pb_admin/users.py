@@ -1,16 +1,22 @@
 import json
-from aiohttp import ClientSession
+from pb_admin._http import PbClient
 from urllib.parse import urlparse, parse_qs
-from pb_admin import schemas
+from pb_admin import schemas, _fields, _records as records
 
 
 class Users():
-    def __init__(self, session: ClientSession, site_url: str, edit_mode: bool) -> None:
+    def __init__(self, session: PbClient, site_url: str, edit_mode: bool) -> None:
         self.session = session
         self.site_url = site_url
         self.edit_mode = edit_mode
 
-    async def get_list(self, search: str = '', limit: int | None = None) -> list[schemas.PbUser]:
+    async def get_list(
+        self,
+        search: str = '',
+        limit: int | None = None,
+        as_records: bool = False,
+    ) -> list[schemas.PbUser] | list[records.Record]:
+        """`as_records` returns compact slotted records, see `Record.to_model`."""
         users = []
         is_next_page = True
         params = {
@@ -29,7 +35,10 @@ class Users():
                         values[cell['attribute']] = cell['value']
 
                     users.append(
-                        schemas.PbUser(
+                        _fields.build(
+                            schemas.PbUser,
+                            self.session.trusted_reads,
+                            as_records,
                             ident=values.get('id'),
                             name=values.get('name'),
                             email=values.get('email'),
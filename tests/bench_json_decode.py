@@ -0,0 +1,65 @@
+"""Opt-in benchmark of JSON decode backends on a Nova-shaped index page.
+
+Run with: python tests/bench_json_decode.py
+"""
+import json
+import timeit
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def make_index_page(rows: int = 100) -> str:
+    """Index page like /nova-api/orders returns, `rows` resources of ten fields each."""
+    resources = []
+    for i in range(rows):
+        values = {
+            'id': i,
+            'count': 1,
+            'price': '12.00',
+            'discounted_price': '9.60',
+            'payed': 'Payed',
+            'created_at': '2024-01-01T10:00:00.000000Z',
+            'user': f'user{i}@example.com',
+            'coupon': None,
+            'Orderable': f'Product {i}',
+            'is_extended_license': False,
+        }
+        resources.append({
+            'id': {'value': i, 'attribute': 'id'},
+            'title': f'Order {i}',
+            'fields': [
+                {
+                    'attribute': attribute,
+                    'value': value,
+                    'component': 'text-field',
+                    'name': attribute.replace('_', ' ').title(),
+                    'sortable': True,
+                    'belongsToId': i if attribute == 'user' else None,
+                    'resourceName': 'users' if attribute == 'user' else None,
+                }
+                for attribute, value in values.items()
+            ],
+        })
+    return json.dumps({
+        'resources': resources,
+        'per_page': rows,
+        'total': rows * 10,
+        'next_page_url': '/nova-api/orders?page=2',
+    })
+
+
+def main(number: int = 200, repeat: int = 5) -> None:
+    page = make_index_page()
+    backends = {'json': json.loads}
+    if orjson:
+        backends['orjson'] = orjson.loads
+    for name, loads in backends.items():
+        best = min(timeit.repeat(lambda: loads(page), number=number, repeat=repeat))
+        print(f'{name}: {best / number * 1000:.3f} ms per {len(page) // 1024} KiB page')
+
+
+if __name__ == '__main__':
+    main()
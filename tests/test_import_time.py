@@ -0,0 +1,59 @@
+"""`import pb_admin` stays light: heavy dependencies load with the resources that use them."""
+import importlib
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ('bs4', 'PIL', 'loguru', 'pandas', 'pydantic', 'requests_toolbelt')
+
+
+def get_imported_modules(code: str) -> set[str]:
+    """Modules imported by `code` in a fresh interpreter, as `-X importtime` lists them."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return {
+        line.rsplit('|', 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith('import time:') and '|' in line
+    }
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_package_import_skips_heavy_modules(self):
+        modules = get_imported_modules('import pb_admin')
+        self.assertIn('pb_admin', modules)
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, modules, f'{name} is imported by `import pb_admin`')
+
+    def test_session_without_resources_skips_heavy_modules(self):
+        modules = get_imported_modules(
+            'import pb_admin; pb_admin.PbSession; pb_admin.RateLimiter(); pb_admin.ReadCache()'
+        )
+        for name in HEAVY_MODULES:
+            self.assertNotIn(name, modules)
+
+    def test_resource_names_import_lazily(self):
+        import pb_admin
+        from pb_admin import Products
+        from pb_admin.products import Products as products_cls
+        self.assertIs(Products, products_cls)
+        self.assertIs(pb_admin.Tags, importlib.import_module('pb_admin.tags').Tags)
+        self.assertIs(pb_admin.mirror, importlib.import_module('pb_admin.mirror'))
+        with self.assertRaises(AttributeError):
+            pb_admin.Unknown
+
+    def test_resource_access_imports_its_dependencies(self):
+        modules = get_imported_modules('import pb_admin.tags')
+        self.assertIn('loguru', modules)
+        self.assertIn('pydantic', modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
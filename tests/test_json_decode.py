@@ -0,0 +1,50 @@
+"""Decode backend of admin responses, see PbSession(json_loads=...)."""
+import json
+import unittest
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from pb_admin import PbSession
+from pb_admin._http import get_default_json_loads
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JsonDecodeTest(unittest.IsolatedAsyncioTestCase):
+    def test_default_backend(self):
+        expected = orjson.loads if orjson else json.loads
+        self.assertIs(get_default_json_loads(), expected)
+
+    async def test_session_loads_decodes_responses(self):
+        async def index(request: web.Request) -> web.Response:
+            return web.json_response({'resources': [], 'next_page_url': None})
+
+        app = web.Application()
+        app.router.add_get('/nova-api/tags', index)
+        calls = []
+
+        def loads(raw: str):
+            calls.append(raw)
+            return json.loads(raw)
+
+        async with TestServer(app) as server:
+            pb = PbSession(
+                site_url=str(server.make_url('')), json_loads=loads, cookie_jar_path=None
+            )
+            try:
+                async with pb.client.get(server.make_url('/nova-api/tags')) as resp:
+                    raw_page = await resp.json()
+                async for page in pb.client.iter_pages(str(server.make_url('/nova-api/tags')), {}):
+                    self.assertEqual(page, raw_page)
+            finally:
+                await pb.close()
+        self.assertEqual(raw_page, {'resources': [], 'next_page_url': None})
+        self.assertEqual(len(calls), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()